@@ -0,0 +1,149 @@
+# Incremental Build Manifest for SlideTheory marketing exports
+# Records a content hash per output file so exporters only rewrite (and deploys only upload) what changed
+
+from typing import Dict, List, Optional
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+MANIFEST_NAME = ".build-manifest.json"
+UMASK = os.umask(0o022)
+os.umask(UMASK)  # Read once; temp files get regular permissions before being renamed into place
+
+# Generation timestamps change on every run without the content changing
+VOLATILE_LINES = re.compile(rb'^[ \t]*"?(publish_date|updated_date)"?[ \t]*:.*$', re.MULTILINE)
+
+
+def content_hash(data: bytes) -> str:
+    """sha256 of an output with volatile timestamp lines blanked"""
+    return hashlib.sha256(VOLATILE_LINES.sub(b"", data)).hexdigest()
+
+
+def atomic_write(path: str, data: bytes):
+    """Replace path with data via a temp file in the same directory"""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o666 & ~UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class BuildManifest:
+    """Content hashes of one builder's outputs in an output directory
+
+    All builders exporting to the same directory share one manifest file, each in
+    its own section, so stale-file removal only touches the builder's own outputs.
+    Paths are relative to the output directory.
+    """
+
+    def __init__(self, output_dir: str, builder: str):
+        self.output_dir = output_dir
+        self.builder = builder
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self._data = {"version": 1, "builders": {}}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._data = json.load(f)
+        self.previous: Dict[str, Dict] = dict(self._data["builders"].get(builder, {}))
+        self.current: Dict[str, Dict] = {}
+        self.report: Dict[str, List[str]] = {"added": [], "changed": [], "removed": [], "unchanged": []}
+
+    def previous_hash(self, relpath: str) -> Optional[str]:
+        entry = self.previous.get(relpath)
+        return entry["sha256"] if entry else None
+
+    def record(self, relpath: str, sha256: str, size: int, wrote: bool) -> str:
+        """Register an output produced this run; returns added / changed / unchanged"""
+        if relpath not in self.previous:
+            status = "added"
+        else:
+            status = "changed" if wrote else "unchanged"
+        self.current[relpath] = {"sha256": sha256, "bytes": size}
+        self.report[status].append(relpath)
+        return status
+
+    def write(self, relpath: str, data) -> str:
+        """Write an output only if its content changed (or the file is missing)"""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        sha256 = content_hash(data)
+        path = os.path.join(self.output_dir, relpath)
+        wrote = self.previous_hash(relpath) != sha256 or not os.path.exists(path)
+        if wrote:
+            atomic_write(path, data)
+        return self.record(relpath, sha256, len(data), wrote)
+
+    def finish(self, remove_stale: bool = True) -> Dict[str, List[str]]:
+        """Delete outputs this builder no longer produces and save the manifest if anything changed"""
+        self.report["removed"] = [p for p in self.previous if p not in self.current]
+        if remove_stale:
+            for relpath in self.report["removed"]:
+                try:
+                    os.unlink(os.path.join(self.output_dir, relpath))
+                except FileNotFoundError:
+                    pass
+        if self.current != self.previous:
+            self._data["builders"][self.builder] = self.current
+            atomic_write(self.path, (json.dumps(self._data, indent=2, sort_keys=True) + "\n").encode("utf-8"))
+        return self.report
+
+
+def format_report(report: Dict[str, List[str]]) -> str:
+    return (f"{len(report['added'])} added, {len(report['changed'])} changed, "
+            f"{len(report['removed'])} removed, {len(report['unchanged'])} unchanged")
+
+
+def manifest_files(output_dir: str) -> Dict[str, str]:
+    """All builders' outputs in a directory: relpath -> sha256"""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {relpath: entry["sha256"]
+            for files in data["builders"].values() for relpath, entry in files.items()}
+
+
+def diff_files(deployed: Dict[str, str], current: Dict[str, str]) -> Dict[str, List[str]]:
+    """Paths to upload and delete to bring a deployed snapshot up to date"""
+    return {
+        "upload": sorted(p for p, sha in current.items() if deployed.get(p) != sha),
+        "delete": sorted(p for p in deployed if p not in current),
+    }
+
+
+# CLI Interface
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="SlideTheory build manifest: plan partial uploads")
+    parser.add_argument("output_dir", help="Export directory containing .build-manifest.json")
+    parser.add_argument("--since", type=str, help="Deployed snapshot to diff against (missing = full upload)")
+    parser.add_argument("--mark-deployed", type=str, metavar="SNAPSHOT",
+                        help="Record the current outputs as deployed")
+
+    args = parser.parse_args()
+
+    current = manifest_files(args.output_dir)
+
+    if args.mark_deployed:
+        atomic_write(args.mark_deployed, (json.dumps(current, indent=2, sort_keys=True) + "\n").encode("utf-8"))
+        print(f"Marked {len(current)} files as deployed in {args.mark_deployed}")
+
+    else:
+        deployed = {}
+        if args.since and os.path.exists(args.since):
+            with open(args.since, "r", encoding="utf-8") as f:
+                deployed = json.load(f)
+        plan = diff_files(deployed, current)
+        for relpath in plan["upload"]:
+            print(f"upload {relpath}")
+        for relpath in plan["delete"]:
+            print(f"delete {relpath}")
@@ -2,10 +2,18 @@
 # Generates AI-powered blog posts about consulting and presentations
 
 from dataclasses import dataclass
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Iterator
 from datetime import datetime
 import json
+import os
 import re
+import sys
+
+try:
+    from build_manifest import BuildManifest, format_report
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    from build_manifest import BuildManifest, format_report
 
 @dataclass
 class BlogPost:
@@ -245,6 +253,27 @@ publish_date: "{post.publish_date or datetime.now().isoformat()}"
             "publish_date": post.publish_date
         }, indent=2)
     
+    def export_directory(self, posts: List[BlogPost], output_dir: str, fmt: str = "markdown") -> Dict:
+        """Write posts to <output_dir>/<slug>.md|json, rewriting only changed files"""
+        os.makedirs(output_dir, exist_ok=True)
+        manifest = BuildManifest(output_dir, "blog")
+        for post in posts:
+            if fmt == "markdown":
+                manifest.write(f"{post.slug}.md", self.export_to_markdown(post))
+            else:
+                manifest.write(f"{post.slug}.json", self.export_to_json(post))
+        return manifest.finish()
+    
+    def iter_feed_entries(self, base_url: str = "https://slidetheory.io") -> Iterator[Dict]:
+        """Sitemap/RSS entries for generated posts"""
+        for post in self.generated_posts:
+            yield {
+                "loc": f"{base_url.rstrip('/')}/blog/{post.slug}",
+                "lastmod": post.publish_date,
+                "title": post.title,
+                "description": post.excerpt,
+            }
+    
     def get_editorial_calendar(self, weeks: int = 4) -> List[Dict]:
         """Generate editorial calendar"""
         calendar = []
@@ -277,6 +306,13 @@ if __name__ == "__main__":
     if args.calendar:
         calendar = generator.get_editorial_calendar()
         print(json.dumps(calendar, indent=2))
+    elif args.output:
+        posts = generator.generate_batch(args.batch)
+        report = generator.export_directory(posts, args.output, args.format)
+        for status in ("added", "changed", "removed"):
+            for relpath in report[status]:
+                print(f"{status.capitalize()}: {os.path.join(args.output, relpath)}")
+        print(f"Exported to {args.output}: {format_report(report)}")
     else:
         posts = generator.generate_batch(args.batch)
         for post in posts:
@@ -284,15 +320,5 @@ if __name__ == "__main__":
                 output = generator.export_to_markdown(post)
             else:
                 output = generator.export_to_json(post)
-            
-            if args.output:
-                import os
-                os.makedirs(args.output, exist_ok=True)
-                filename = f"{post.slug}.{args.format if args.format == 'json' else 'md'}"
-                filepath = os.path.join(args.output, filename)
-                with open(filepath, 'w') as f:
-                    f.write(output)
-                print(f"Generated: {filepath}")
-            else:
-                print(output)
-                print("\n" + "="*60 + "\n")
+            print(output)
+            print("\n" + "="*60 + "\n")
@@ -2,12 +2,24 @@
 # Weekly tips and insights for better presentations
 
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Iterable, Iterator, Tuple
 from datetime import datetime, timedelta
 from enum import Enum
+from html import escape
+from urllib.parse import quote
+import csv
+import hashlib
 import json
+import re
 import uuid
 
+# Per-recipient placeholders left in rendered output, filled at send time
+SLOT_PATTERN = re.compile(r"\{\{(\w+)\}\}")
+# Trailing sentence punctuation and closing brackets are left outside the link
+TRACKED_URL = re.compile(r'https://slidetheory\.com(?:[^\s"<>]*[^\s"<>.,;:!?)\]])?')
+UNSUBSCRIBE_BASE = "https://slidetheory.com/unsubscribe"
+DEFAULT_FIRST_NAME = "there"
+
 class NewsletterType(Enum):
     WEEKLY_TIPS = "weekly_tips"
     CASE_STUDY_SPOTLIGHT = "case_study"
@@ -48,6 +60,7 @@ class Newsletter:
     segment: Segment = Segment.ALL
     
     # Content sections
+    salutation: str = "Hi {{first_name}},"
     greeting: str = ""
     main_article: Optional[Article] = None
     tips: List[Tip] = field(default_factory=list)
@@ -64,6 +77,93 @@ class Newsletter:
     click_rate: Optional[float] = None
     unsubscribe_rate: Optional[float] = None
 
+@dataclass
+class Subscriber:
+    email: str
+    first_name: str = ""
+    subscriber_id: str = ""
+    unsubscribe_url: Optional[str] = None
+    
+    def __post_init__(self):
+        # Opaque id for tracking links, so addresses never end up in URLs
+        if not self.subscriber_id:
+            self.subscriber_id = hashlib.sha256(self.email.strip().lower().encode("utf-8")).hexdigest()[:16]
+    
+    @staticmethod
+    def iter_file(path: str) -> Iterator["Subscriber"]:
+        """Stream subscribers from CSV or JSONL one row at a time
+        
+        Columns/keys: email, optional first_name, subscriber_id (or id), unsubscribe_url.
+        """
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            if path.lower().endswith(".csv"):
+                rows = csv.DictReader(f)
+            else:
+                rows = (json.loads(line) for line in f if line.strip())
+            for n, row in enumerate(rows, 1):
+                try:
+                    yield Subscriber(
+                        email=row["email"].strip(),
+                        first_name=(row.get("first_name") or "").strip(),
+                        subscriber_id=str(row.get("subscriber_id") or row.get("id") or "").strip(),
+                        unsubscribe_url=row.get("unsubscribe_url") or None
+                    )
+                except (KeyError, AttributeError) as e:
+                    raise ValueError(f"{path}: row {n}: {e!r}") from e
+
+
+class CompiledNewsletter:
+    """A newsletter rendered once, split into literal chunks and per-recipient slots
+    
+    The literal chunks are shared by every message of a send; rendering for a
+    subscriber only computes the slot values and joins them in.
+    """
+    
+    SLOTS = ("first_name", "subscriber_id", "unsubscribe_url")
+    
+    def __init__(self, newsletter_id: str, fmt: str, source: str):
+        self.newsletter_id = newsletter_id
+        self.fmt = fmt
+        self._escape = fmt == "html"
+        self._parts: List[str] = []
+        self._slots: List[Tuple[int, str]] = []
+        pos = 0
+        for match in SLOT_PATTERN.finditer(source):
+            name = match.group(1)
+            if name not in self.SLOTS:
+                raise ValueError(f"Newsletter {newsletter_id}: unknown slot {match.group(0)}")
+            self._parts.append(source[pos:match.start()])
+            self._slots.append((len(self._parts), name))
+            self._parts.append("")
+            pos = match.end()
+        self._parts.append(source[pos:])
+    
+    @property
+    def slot_names(self) -> List[str]:
+        return [name for _, name in self._slots]
+    
+    def slot_values(self, subscriber: Subscriber) -> Dict[str, str]:
+        sid = quote(subscriber.subscriber_id, safe="")
+        first_name = subscriber.first_name or DEFAULT_FIRST_NAME
+        unsubscribe_url = subscriber.unsubscribe_url or f"{UNSUBSCRIBE_BASE}?sid={sid}"
+        if self._escape:
+            first_name = escape(first_name)
+            unsubscribe_url = escape(unsubscribe_url)
+        return {"first_name": first_name, "subscriber_id": sid, "unsubscribe_url": unsubscribe_url}
+    
+    def render(self, subscriber: Subscriber) -> str:
+        """Fill the slots for one subscriber"""
+        parts = self._parts.copy()
+        values = self.slot_values(subscriber)
+        for index, name in self._slots:
+            parts[index] = values[name]
+        return "".join(parts)
+    
+    def iter_render(self, subscribers: Iterable[Subscriber]) -> Iterator[Tuple[Subscriber, str]]:
+        """Render lazily so a send never holds more than one message in memory"""
+        for subscriber in subscribers:
+            yield subscriber, self.render(subscriber)
+
 
 class NewsletterEngine:
     """Generate and schedule SlideTheory's email newsletter"""
@@ -103,6 +203,9 @@ class NewsletterEngine:
         ]
     }
     
+    # Appended to every slidetheory.com link; sid is filled per recipient
+    TRACKING_PARAMS = (("utm_source", "newsletter"), ("utm_medium", "email"))
+    
     # Weekly tip themes
     TIP_THEMES = [
         {
@@ -195,7 +298,7 @@ class NewsletterEngine:
                 ),
                 Tip(
                     title="Handle Questions with Grace",
-                    content=""You don't know" is a valid answer. "I'll get back to you by [time]" shows professionalism. Never guess publicly.""",
+                    content='''"You don't know" is a valid answer. "I'll get back to you by [time]" shows professionalism. Never guess publicly.''',
                     action_item="Prepare 3 graceful responses for questions you might not know the answer to.",
                     difficulty="medium"
                 )
@@ -390,7 +493,11 @@ class NewsletterEngine:
         <h1 style="color: #1a1a1a;">SlideTheory</h1>
     </div>
     
-    <p style="font-size: 18px; color: #333;">{newsletter.greeting}</p>
+"""
+        if newsletter.salutation:
+            html += f"""    <p style="font-size: 18px; color: #333;">{newsletter.salutation}</p>
+"""
+        html += f"""    <p style="font-size: 18px; color: #333;">{newsletter.greeting}</p>
 """
         
         if newsletter.main_article:
@@ -451,6 +558,8 @@ class NewsletterEngine:
     def render_text(self, newsletter: Newsletter) -> str:
         """Render newsletter as plain text"""
         text = f"{newsletter.subject_line}\n\n"
+        if newsletter.salutation:
+            text += f"{newsletter.salutation}\n\n"
         text += f"{newsletter.greeting}\n\n"
         
         if newsletter.main_article:
@@ -477,6 +586,48 @@ class NewsletterEngine:
         
         return text
     
+    def tracking_query(self, newsletter: Newsletter, fmt: str = "html") -> str:
+        """Query string added to tracked links, ending in the subscriber_id slot"""
+        params = self.TRACKING_PARAMS + (("utm_campaign", newsletter.id),)
+        sep = "&amp;" if fmt == "html" else "&"
+        return sep.join(f"{key}={quote(value, safe='')}" for key, value in params) + sep + "sid={{subscriber_id}}"
+    
+    def compile(self, newsletter: Newsletter, fmt: str = "html") -> CompiledNewsletter:
+        """Render a newsletter once, with tracked links, for per-subscriber filling"""
+        source = self.render_html(newsletter) if fmt == "html" else self.render_text(newsletter)
+        query = self.tracking_query(newsletter, fmt)
+        sep = "&amp;" if fmt == "html" else "&"
+        
+        def track(match):
+            url = match.group(0)
+            if url.startswith(UNSUBSCRIBE_BASE):
+                return url
+            return url + (sep if "?" in url else "?") + query
+        
+        return CompiledNewsletter(newsletter.id, fmt, TRACKED_URL.sub(track, source))
+    
+    def write_spool(self, newsletter: Newsletter, subscribers: Iterable[Subscriber], path: str) -> Dict:
+        """Stream one JSON message per subscriber (to, subject, html, text) to a spool file"""
+        import time
+        
+        html = self.compile(newsletter, "html")
+        text = self.compile(newsletter, "text")
+        encoder = json.JSONEncoder(ensure_ascii=False)
+        count = 0
+        start = time.perf_counter()
+        with open(path, "w", encoding="utf-8") as f:
+            for subscriber, body in html.iter_render(subscribers):
+                f.write(encoder.encode({
+                    "to": subscriber.email,
+                    "subject": newsletter.subject_line,
+                    "html": body,
+                    "text": text.render(subscriber)
+                }))
+                f.write("\n")
+                count += 1
+        seconds = time.perf_counter() - start
+        return {"messages": count, "seconds": seconds, "per_second": count / seconds if seconds else 0.0}
+    
     def export_schedule(self) -> str:
         """Export newsletter schedule as JSON"""
         schedule = []
@@ -504,6 +655,9 @@ if __name__ == "__main__":
     parser.add_argument("--html", action="store_true", help="Output HTML version")
     parser.add_argument("--text", action="store_true", help="Output plain text version")
     parser.add_argument("--schedule", action="store_true", help="Export schedule")
+    parser.add_argument("--subscribers", type=str, help="CSV/JSONL subscriber list to render the weekly newsletter for")
+    parser.add_argument("--spool", type=str, default="newsletter-spool.jsonl",
+                        help="Output JSONL of per-subscriber messages (with --subscribers)")
     
     args = parser.parse_args()
     
@@ -517,6 +671,12 @@ if __name__ == "__main__":
         for nl in newsletters:
             print(f"  {nl.send_date.strftime('%Y-%m-%d')}: {nl.subject_line}")
     
+    elif args.subscribers:
+        nl = engine.generate_weekly_tips()
+        stats = engine.write_spool(nl, Subscriber.iter_file(args.subscribers), args.spool)
+        print(f"Rendered {stats['messages']} messages to {args.spool} in {stats['seconds']:.1f}s "
+              f"({stats['per_second']:.0f}/s)")
+    
     elif args.weekly:
         nl = engine.generate_weekly_tips()
         if args.html:
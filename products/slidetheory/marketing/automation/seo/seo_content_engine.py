@@ -2,12 +2,33 @@
 # Long-form articles targeting high-value keywords
 
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Tuple
+from typing import List, Optional, Dict, Tuple, Iterable, Iterator
+from collections import defaultdict
 from datetime import datetime
+from email.utils import format_datetime
+from xml.sax.saxutils import escape
 from enum import Enum
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import gzip
+import heapq
+import hashlib
+import math
+import os
+import random
+import re
+import sys
+import time
+import csv
 import json
 import uuid
 
+try:
+    from build_manifest import BuildManifest, atomic_write, content_hash, format_report
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    from build_manifest import BuildManifest, atomic_write, content_hash, format_report
+
 class ContentPillar(Enum):
     PRESENTATION_DESIGN = "presentation_design"
     CONSULTING_CAREER = "consulting_career"
@@ -30,6 +51,11 @@ class KeywordCluster:
     difficulty: int     # 1-100
     intent: SearchIntent
     pillar: ContentPillar
+    
+    def identity(self) -> Tuple:
+        """Hashable tuple of every field (clusters are mutable, so not hashable themselves)"""
+        return (self.primary_keyword, tuple(self.secondary_keywords), self.search_volume,
+                self.difficulty, self.intent, self.pillar)
 
 @dataclass
 class SEOSection:
@@ -65,6 +91,407 @@ class SEOArticle:
     author: str = "SlideTheory Editorial Team"
 
 
+SITE_URL = "https://slidetheory.io"
+SITEMAP_MAX_URLS = 50000
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024  # Uncompressed limit per sitemap file
+SITEMAP_HEADER = b'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+SITEMAP_FOOTER = b"</urlset>\n"
+
+
+def _gzip_writer(path: str):
+    # mtime=0 keeps output byte-identical across runs when content is unchanged
+    return gzip.GzipFile(filename=path, mode="wb", mtime=0)
+
+
+def write_sitemaps(entries: Iterable[Dict], output_dir: str, base_url: str = SITE_URL,
+                   prefix: str = "sitemap") -> List[str]:
+    """Stream feed entries into gzip sitemap shards plus a sitemap index
+    
+    Entries ({"loc", "lastmod"}) are consumed one at a time and written straight
+    into <prefix>-N.xml.gz; a new shard starts at 50,000 URLs or 50 MB. Returns
+    the index path followed by the shard paths.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    shards: List[str] = []
+    out, count, size = None, 0, 0
+    for entry in entries:
+        lastmod = f"<lastmod>{entry['lastmod'][:10]}</lastmod>" if entry.get("lastmod") else ""
+        data = f"  <url><loc>{escape(entry['loc'])}</loc>{lastmod}</url>\n".encode("utf-8")
+        if out is None or count >= SITEMAP_MAX_URLS or size + len(data) + len(SITEMAP_FOOTER) > SITEMAP_MAX_BYTES:
+            if out is not None:
+                out.write(SITEMAP_FOOTER)
+                out.close()
+            shards.append(os.path.join(output_dir, f"{prefix}-{len(shards) + 1}.xml.gz"))
+            out = _gzip_writer(shards[-1])
+            out.write(SITEMAP_HEADER)
+            count, size = 0, len(SITEMAP_HEADER)
+        out.write(data)
+        count += 1
+        size += len(data)
+    if out is not None:
+        out.write(SITEMAP_FOOTER)
+        out.close()
+    
+    index_path = os.path.join(output_dir, f"{prefix}.xml")
+    with open(index_path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        for shard in shards:
+            f.write(f"  <sitemap><loc>{escape(base_url.rstrip('/'))}/{os.path.basename(shard)}</loc></sitemap>\n")
+        f.write("</sitemapindex>\n")
+    return [index_path] + shards
+
+
+def write_rss(entries: Iterable[Dict], path: str, title: str = "SlideTheory", link: str = SITE_URL,
+              description: str = "Presentation and consulting insights from SlideTheory",
+              limit: int = 50) -> int:
+    """Write a gzip RSS 2.0 feed of the `limit` most recent entries
+    
+    Selection streams the entries through a bounded heap, so memory depends on
+    `limit`, not on the corpus. Returns the number of items written.
+    """
+    recent = heapq.nlargest(limit, entries, key=lambda e: e.get("lastmod") or "")
+    with _gzip_writer(path) as out:
+        out.write(f"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0">
+<channel>
+  <title>{escape(title)}</title>
+  <link>{escape(link)}</link>
+  <description>{escape(description)}</description>
+""".encode("utf-8"))
+        for entry in recent:
+            pub_date = ""
+            if entry.get("lastmod"):
+                pub_date = f"<pubDate>{format_datetime(datetime.fromisoformat(entry['lastmod']))}</pubDate>"
+            out.write(f"""  <item><title>{escape(entry.get('title', ''))}</title><link>{escape(entry['loc'])}</link><guid>{escape(entry['loc'])}</guid>{pub_date}<description>{escape(entry.get('description', ''))}</description></item>
+""".encode("utf-8"))
+        out.write(b"</channel>\n</rss>\n")
+    return len(recent)
+
+
+def render_article_markdown(article: SEOArticle) -> str:
+    """Render an article as markdown with frontmatter"""
+    cluster = article.keyword_cluster
+    parts = [f"""---
+title: "{article.title}"
+meta_title: "{article.meta_title}"
+meta_description: "{article.meta_description}"
+slug: "{article.url_slug}"
+author: "{article.author}"
+reading_time: {article.reading_time}
+publish_date: "{article.publish_date}"
+keywords: {json.dumps([cluster.primary_keyword] + cluster.secondary_keywords)}
+pillar: "{cluster.pillar.value}"
+search_intent: "{cluster.intent.value}"
+---
+
+""", f"# {article.title}\n\n", f"{article.intro}\n\n"]
+    
+    for section in article.sections:
+        parts.append(f"## {section.heading}\n\n")
+        parts.extend(f"- {point}\n" for point in section.content_outline)
+        parts.append(f"\n[Target: {section.word_count_target} words]\n\n")
+        parts.append(f"*Keywords: {', '.join(section.target_keywords)}*\n\n")
+    
+    if article.faq_section:
+        parts.append("## Frequently Asked Questions\n\n")
+        for faq in article.faq_section:
+            parts.append(f"**Q: {faq['question']}\n\n")
+            parts.append(f"A:** {faq['answer']}\n\n")
+    
+    if article.internal_links:
+        parts.append("## Related Reading\n\n")
+        parts.extend(f"- [{link['title']}]({link['url']})\n" for link in article.internal_links)
+        parts.append("\n")
+    
+    parts.append(f"## Conclusion\n\n{article.conclusion}")
+    return "".join(parts)
+
+
+def _write_article_markdown(job: Tuple[SEOArticle, str, Optional[str]]) -> Tuple[str, str, int, bool]:
+    """Process-pool worker: render one article and atomically replace <slug>.md if its hash changed
+    
+    Returns (relative path, content hash, bytes, whether the file was written).
+    """
+    article, output_dir, previous_hash = job
+    data = render_article_markdown(article).encode("utf-8")
+    relpath = f"{article.url_slug}.md"
+    path = os.path.join(output_dir, relpath)
+    sha256 = content_hash(data)
+    wrote = sha256 != previous_hash or not os.path.exists(path)
+    if wrote:
+        atomic_write(path, data)
+    return relpath, sha256, len(data), wrote
+
+
+class KeywordClusterStore:
+    """Keyword clusters indexed by pillar, intent and difficulty band
+    
+    Index lists keep insertion order; volume-sorted views are built on first use
+    and dropped whenever clusters are added.
+    """
+    
+    BAND_WIDTH = 10  # Difficulty points per band (1-100 -> 10 bands)
+    
+    def __init__(self, clusters: Iterable[KeywordCluster] = ()):
+        self.clusters: List[KeywordCluster] = []
+        self._by_pillar: Dict[ContentPillar, List[int]] = defaultdict(list)
+        self._by_intent: Dict[SearchIntent, List[int]] = defaultdict(list)
+        self._by_band: Dict[int, List[int]] = defaultdict(list)
+        self._pillar_volume: Dict[ContentPillar, int] = defaultdict(int)
+        self._volume_views: Dict[Tuple, List[int]] = {}
+        self.extend(clusters)
+    
+    @classmethod
+    def from_file(cls, path: str) -> "KeywordClusterStore":
+        """Load clusters from a keyword research export (CSV or JSONL)"""
+        return cls(cls.iter_file(path))
+    
+    @staticmethod
+    def iter_file(path: str) -> Iterator[KeywordCluster]:
+        """Stream clusters from CSV or JSONL one row at a time
+        
+        Columns/keys: primary_keyword, secondary_keywords (list, or "|"-separated in CSV),
+        search_volume, difficulty, intent, pillar (enum values).
+        """
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            if path.lower().endswith(".csv"):
+                rows = csv.DictReader(f)
+            else:
+                rows = (json.loads(line) for line in f if line.strip())
+            for n, row in enumerate(rows, 1):
+                try:
+                    secondary = row.get("secondary_keywords") or []
+                    if isinstance(secondary, str):
+                        secondary = [k.strip() for k in secondary.split("|") if k.strip()]
+                    yield KeywordCluster(
+                        primary_keyword=row["primary_keyword"].strip(),
+                        secondary_keywords=list(secondary),
+                        search_volume=int(row["search_volume"]),
+                        difficulty=int(row["difficulty"]),
+                        intent=SearchIntent(row["intent"].strip().lower()),
+                        pillar=ContentPillar(row["pillar"].strip().lower())
+                    )
+                except (KeyError, ValueError, AttributeError) as e:
+                    raise ValueError(f"{path}: row {n}: {e!r}") from e
+    
+    def add(self, cluster: KeywordCluster):
+        index = len(self.clusters)
+        self.clusters.append(cluster)
+        self._by_pillar[cluster.pillar].append(index)
+        self._by_intent[cluster.intent].append(index)
+        self._by_band[self.band(cluster.difficulty)].append(index)
+        self._pillar_volume[cluster.pillar] += cluster.search_volume
+        self._volume_views.clear()
+    
+    def extend(self, clusters: Iterable[KeywordCluster]):
+        for cluster in clusters:
+            self.add(cluster)
+    
+    def __len__(self) -> int:
+        return len(self.clusters)
+    
+    def __iter__(self) -> Iterator[KeywordCluster]:
+        return iter(self.clusters)
+    
+    def band(self, difficulty: int) -> int:
+        return max(0, min(difficulty, 100) - 1) // self.BAND_WIDTH
+    
+    def by_pillar(self, pillar: ContentPillar) -> List[KeywordCluster]:
+        return [self.clusters[i] for i in self._by_pillar.get(pillar, [])]
+    
+    def pillar_indexes(self, pillar: ContentPillar) -> List[int]:
+        """Positions in self.clusters of a pillar's clusters"""
+        return self._by_pillar.get(pillar, [])
+    
+    def by_intent(self, intent: SearchIntent) -> List[KeywordCluster]:
+        return [self.clusters[i] for i in self._by_intent.get(intent, [])]
+    
+    def by_band(self, band: int) -> List[KeywordCluster]:
+        return [self.clusters[i] for i in self._by_band.get(band, [])]
+    
+    def pillar_volume(self, pillar: ContentPillar) -> int:
+        return self._pillar_volume.get(pillar, 0)
+    
+    def _volume_view(self, key: Tuple) -> List[int]:
+        """Cluster indexes for an index key, sorted by volume (desc), ties in insertion order"""
+        if key not in self._volume_views:
+            kind, value = key
+            indexes = {"all": range(len(self.clusters)), "pillar": self._by_pillar.get(value, []),
+                       "band": self._by_band.get(value, [])}[kind]
+            self._volume_views[key] = sorted(indexes, key=lambda i: (-self.clusters[i].search_volume, i))
+        return self._volume_views[key]
+    
+    def top_by_volume(self, pillar: Optional[ContentPillar] = None,
+                      limit: Optional[int] = None) -> List[KeywordCluster]:
+        view = self._volume_view(("pillar", pillar) if pillar else ("all", None))
+        return [self.clusters[i] for i in view[:limit]]
+    
+    def high_opportunity(self, max_difficulty: int) -> List[KeywordCluster]:
+        """Clusters at or below max_difficulty by volume (desc), merged from per-band views"""
+        if max_difficulty < 1:
+            return []
+        last_band = self.band(max_difficulty)
+        views = [self._volume_view(("band", b)) for b in range(last_band)]
+        edge = [i for i in self._volume_view(("band", last_band))
+                if self.clusters[i].difficulty <= max_difficulty]
+        merged = heapq.merge(*views, edge, key=lambda i: (-self.clusters[i].search_volume, i))
+        return [self.clusters[i] for i in merged]
+
+
+class OpportunityScorer:
+    """Column-oriented opportunity scoring over a KeywordClusterStore
+    
+    score = search volume x (100 - difficulty) / 100 x intent weight
+    
+    Volume, difficulty, intent and pillar live in typed arrays that grow with the
+    (append-only) store. Scores are computed from those columns in one pass, cached
+    until new clusters arrive, and recomputed from the columns alone when intent
+    weights change. Per-pillar queries use the store's pillar index; the pillar
+    column serves the all-pillar pass.
+    """
+    
+    INTENT_WEIGHTS = {
+        SearchIntent.TRANSACTIONAL: 1.5,
+        SearchIntent.COMMERCIAL: 1.25,
+        SearchIntent.INFORMATIONAL: 1.0,
+        SearchIntent.NAVIGATIONAL: 0.5,
+    }
+    
+    def __init__(self, store: KeywordClusterStore, intent_weights: Optional[Dict[SearchIntent, float]] = None):
+        self.store = store
+        self.intent_weights = {**self.INTENT_WEIGHTS, **(intent_weights or {})}
+        self._intents = list(SearchIntent)
+        self._intent_codes = {intent: code for code, intent in enumerate(self._intents)}
+        self._pillars = list(ContentPillar)
+        self._pillar_codes = {pillar: code for code, pillar in enumerate(self._pillars)}
+        self.volume = array("d")
+        self.difficulty = array("d")
+        self.intent = array("B")
+        self.pillar = array("B")
+        self._scores = array("d")
+    
+    def _column_scores(self, start: int) -> Iterator[float]:
+        weights = [self.intent_weights[i] for i in self._intents]
+        return (v * (100 - d) / 100 * weights[i]
+                for v, d, i in zip(self.volume[start:], self.difficulty[start:], self.intent[start:]))
+    
+    def _sync(self):
+        """Append columns (and their scores) for clusters added to the store since the last call"""
+        start = len(self.volume)
+        if start == len(self.store):
+            return
+        for cluster in self.store.clusters[start:]:
+            self.volume.append(cluster.search_volume)
+            self.difficulty.append(cluster.difficulty)
+            self.intent.append(self._intent_codes[cluster.intent])
+            self.pillar.append(self._pillar_codes[cluster.pillar])
+        self._scores.extend(self._column_scores(start))
+    
+    def set_intent_weights(self, intent_weights: Dict[SearchIntent, float]):
+        """Change intent weights and rescore every cluster from the columns"""
+        self.intent_weights = {**self.intent_weights, **intent_weights}
+        self._sync()
+        self._scores = array("d", self._column_scores(0))
+    
+    def score(self, cluster: KeywordCluster) -> float:
+        """Score a single cluster, which need not be in the store"""
+        return cluster.search_volume * (100 - cluster.difficulty) / 100 * self.intent_weights[cluster.intent]
+    
+    def scores(self) -> array:
+        """Scores aligned with store.clusters"""
+        self._sync()
+        return self._scores
+    
+    def top_k(self, k: int, pillar: Optional[ContentPillar] = None) -> List[Tuple[float, KeywordCluster]]:
+        """Best k clusters (optionally within a pillar, O(pillar size)) by partial selection, not a full sort"""
+        scores = self.scores()
+        indexes = self.store.pillar_indexes(pillar) if pillar else range(len(scores))
+        best = heapq.nlargest(k, indexes, key=scores.__getitem__)
+        return [(scores[i], self.store.clusters[i]) for i in best]
+    
+    def top_k_per_pillar(self, k: int) -> Dict[ContentPillar, List[Tuple[float, KeywordCluster]]]:
+        """Best k clusters of every pillar in one pass over the score and pillar columns"""
+        scores = self.scores()
+        heaps: Dict[int, List[Tuple[float, int]]] = defaultdict(list)
+        if k > 0:
+            for i, (score, code) in enumerate(zip(scores, self.pillar)):
+                heap = heaps[code]
+                if len(heap) < k:
+                    heapq.heappush(heap, (score, -i))
+                elif (score, -i) > heap[0]:
+                    heapq.heapreplace(heap, (score, -i))
+        return {
+            pillar: [(score, self.store.clusters[-neg]) for score, neg in sorted(heaps[code], reverse=True)]
+            for code, pillar in enumerate(self._pillars) if code in heaps
+        }
+
+
+class CannibalizationDetector:
+    """Find keyword clusters likely to compete for the same queries
+    
+    Each cluster's keywords are shingled into words and word bigrams, summarized
+    as a MinHash signature, and bucketed with LSH banding so only clusters sharing
+    a band are compared: near-linear instead of all pairs.
+    """
+    
+    MERSENNE_PRIME = (1 << 61) - 1
+    
+    def __init__(self, num_perm: int = 128, bands: int = 32, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, self.MERSENNE_PRIME), rng.randrange(0, self.MERSENNE_PRIME))
+                       for _ in range(num_perm)]
+    
+    @staticmethod
+    def shingles(cluster: KeywordCluster) -> set:
+        shingles = set()
+        for keyword in [cluster.primary_keyword] + cluster.secondary_keywords:
+            words = re.findall(r"\w+", keyword.lower())
+            shingles.update(words)
+            shingles.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+        return shingles
+    
+    def signature(self, shingles: set) -> Tuple[int, ...]:
+        hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+                  for s in shingles]
+        p = self.MERSENNE_PRIME
+        return tuple(min((a * h + b) % p for h in hashes) for a, b in self._perms)
+    
+    def find_pairs(self, clusters: List[KeywordCluster],
+                   threshold: float = 0.5) -> List[Tuple[KeywordCluster, KeywordCluster, float]]:
+        """Candidate pairs with estimated Jaccard similarity >= threshold, most similar first"""
+        signatures = {}
+        for i, cluster in enumerate(clusters):
+            shingles = self.shingles(cluster)
+            if shingles:
+                signatures[i] = self.signature(shingles)
+        
+        candidates = set()
+        for band in range(self.bands):
+            lo, hi = band * self.rows, (band + 1) * self.rows
+            buckets: Dict[Tuple[int, ...], List[int]] = defaultdict(list)
+            for i, sig in signatures.items():
+                buckets[sig[lo:hi]].append(i)
+            for members in buckets.values():
+                for x in range(len(members)):
+                    for y in range(x + 1, len(members)):
+                        candidates.add((members[x], members[y]))
+        
+        pairs = []
+        for i, j in candidates:
+            a, b = signatures[i], signatures[j]
+            similarity = sum(1 for x, y in zip(a, b) if x == y) / self.num_perm
+            if similarity >= threshold:
+                pairs.append((clusters[i], clusters[j], similarity))
+        pairs.sort(key=lambda pair: -pair[2])
+        return pairs
+
+
 class SEOContentEngine:
     """Generate SEO-optimized long-form content"""
     
@@ -269,6 +696,30 @@ class SEOContentEngine:
             ],
             "tone": "comparative, solution-oriented, trustworthy",
             "word_count": 2000
+        },
+        SearchIntent.TRANSACTIONAL: {
+            "structure": [
+                "What you get with [topic]",
+                "Who it's for",
+                "How it works in three steps",
+                "Pricing and plans",
+                "Customer results",
+                "Getting started today",
+                "FAQ"
+            ],
+            "tone": "direct, confident, low-friction",
+            "word_count": 1200
+        },
+        SearchIntent.NAVIGATIONAL: {
+            "structure": [
+                "What [topic] is",
+                "Key features at a glance",
+                "Where to find it",
+                "Related resources",
+                "FAQ"
+            ],
+            "tone": "clear, concise, on-brand",
+            "word_count": 800
         }
     }
     
@@ -291,12 +742,33 @@ class SEOContentEngine:
         }
     }
     
-    def __init__(self):
+    # URLs
+    SLUG_MAX_LENGTH = 60
+    
+    # Internal linking
+    ARTICLE_URL_PREFIX = "/blog/"
+    LINK_STOPWORDS = {"a", "an", "and", "the", "to", "of", "for", "in", "on", "with", "how", "what",
+                      "is", "vs", "best", "top", "your", "my"}
+    MAX_LINK_POSTINGS = 500  # Terms shared by more articles than this are too generic to link on
+    PILLAR_LINK_BONUS = 1.0
+    
+    # Calendar planning
+    WEEKS_PER_MONTH = 52 / 12
+    
+    def __init__(self, store: Optional[KeywordClusterStore] = None):
+        self.store = store if store is not None else KeywordClusterStore(self.KEYWORD_CLUSTERS)
+        self.scorer = OpportunityScorer(self.store)
         self.articles: List[SEOArticle] = []
+        self._article_cache: Dict[Tuple[Tuple, str], SEOArticle] = {}
+        self._slug_owners: Dict[str, Tuple] = {}
     
     def generate_article(self, keyword_cluster: KeywordCluster,
                          framework: str = "skyscraper") -> SEOArticle:
-        """Generate a complete SEO article from keyword cluster"""
+        """Generate a complete SEO article from keyword cluster (memoized per cluster and framework)"""
+        
+        cache_key = (keyword_cluster.identity(), framework)
+        if cache_key in self._article_cache:
+            return self._article_cache[cache_key]
         
         template = self.CONTENT_TEMPLATES[keyword_cluster.intent]
         
@@ -308,7 +780,12 @@ class SEOContentEngine:
             title=titles[0],
             meta_title=f"{titles[0]} | SlideTheory",
             meta_description=self._generate_meta_description(keyword_cluster),
-            url_slug=self._generate_slug(keyword_cluster.primary_keyword),
+            url_slug=self._claim_slug(
+                self._generate_slug(keyword_cluster.primary_keyword),
+                keyword_cluster.identity(),
+                f"{keyword_cluster.primary_keyword}|{keyword_cluster.pillar.value}|{keyword_cluster.intent.value}",
+                self._slug_owners
+            ),
             keyword_cluster=keyword_cluster,
             publish_date=datetime.now().isoformat()
         )
@@ -337,6 +814,7 @@ class SEOContentEngine:
         article.reading_time = max(5, total_words // 200)
         
         self.articles.append(article)
+        self._article_cache[cache_key] = article
         return article
     
     def _generate_titles(self, cluster: KeywordCluster) -> List[str]:
@@ -357,6 +835,20 @@ class SEOContentEngine:
                 f"How to Choose the Right {cluster.primary_keyword.title()}",
                 f"Top-Rated {cluster.primary_keyword.title()}: Reviewed & Tested"
             ]
+        elif cluster.intent == SearchIntent.TRANSACTIONAL:
+            titles = [
+                f"Get Started with {cluster.primary_keyword.title()}",
+                f"{cluster.primary_keyword.title()}: Plans, Pricing & Free Trial",
+                f"Try {cluster.primary_keyword.title()} Free for 14 Days",
+                f"{cluster.primary_keyword.title()} in Minutes, Not Hours"
+            ]
+        elif cluster.intent == SearchIntent.NAVIGATIONAL:
+            titles = [
+                f"{cluster.primary_keyword.title()}: Official Overview",
+                f"{cluster.primary_keyword.title()} | Features & Resources",
+                f"Everything About {cluster.primary_keyword.title()}",
+                f"{cluster.primary_keyword.title()} Hub"
+            ]
         
         return titles
     
@@ -365,8 +857,21 @@ class SEOContentEngine:
         return f"Learn {cluster.primary_keyword} with our comprehensive guide. Tips from ex-McKinsey consultants on {', '.join(cluster.secondary_keywords[:2])}. Read now."
     
     def _generate_slug(self, keyword: str) -> str:
-        """Generate URL slug"""
-        return keyword.lower().replace(" ", "-").replace("'", "")[:60]
+        """Generate URL slug: lowercase ASCII alphanumerics separated by single hyphens"""
+        slug = re.sub(r"[^a-z0-9]+", "-", keyword.lower().replace("'", ""))[:self.SLUG_MAX_LENGTH].strip("-")
+        return slug or f"article-{hashlib.sha256(keyword.encode('utf-8')).hexdigest()[:8]}"
+    
+    def _claim_slug(self, slug: str, identity: Tuple, seed: str, owners: Dict[str, Tuple]) -> str:
+        """Return slug, or slug plus a short hash of seed if another identity already owns it
+        
+        The first claimant keeps the plain slug, so the result depends only on claim order.
+        """
+        candidate, attempt = slug, 0
+        while owners.setdefault(candidate, identity) != identity:
+            attempt += 1
+            digest = hashlib.sha256(f"{seed}|{attempt}".encode("utf-8")).hexdigest()[:6]
+            candidate = f"{slug[:self.SLUG_MAX_LENGTH - 7].rstrip('-')}-{digest}"
+        return candidate
     
     def _generate_intro(self, cluster: KeywordCluster) -> str:
         """Generate article introduction"""
@@ -444,62 +949,161 @@ Final thought: Inspiring closing about better presentations
 Next steps: Suggested related articles
 """
     
-    def generate_content_calendar(self, months: int = 3) -> List[Dict]:
+    def _link_terms(self, article: SEOArticle) -> set:
+        cluster = article.keyword_cluster
+        words = re.findall(r"\w+", " ".join([cluster.primary_keyword] + cluster.secondary_keywords).lower())
+        return {w for w in words if w not in self.LINK_STOPWORDS}
+    
+    def build_internal_links(self, max_links: int = 5) -> int:
+        """Fill each article's internal_links with its most related articles
+        
+        Builds one inverted index from keyword term to articles; candidates are only
+        articles sharing a term, scored by the IDF of shared terms plus a same-pillar
+        bonus. Returns the number of links written.
+        """
+        articles = [a for a in self.articles if a.keyword_cluster is not None]
+        terms = [self._link_terms(a) for a in articles]
+        index: Dict[str, List[int]] = defaultdict(list)
+        for i, article_terms in enumerate(terms):
+            for term in article_terms:
+                index[term].append(i)
+        idf = {term: math.log(1 + len(articles) / len(postings)) for term, postings in index.items()}
+        
+        total = 0
+        for i, article in enumerate(articles):
+            scores: Dict[int, float] = defaultdict(float)
+            for term in terms[i]:
+                postings = index[term]
+                if len(postings) > self.MAX_LINK_POSTINGS:
+                    continue
+                for j in postings:
+                    if j != i:
+                        scores[j] += idf[term]
+            pillar = article.keyword_cluster.pillar
+            for j in scores:
+                if articles[j].keyword_cluster.pillar == pillar:
+                    scores[j] += self.PILLAR_LINK_BONUS
+            
+            best = heapq.nlargest(max_links, scores.items(), key=lambda item: (item[1], -item[0]))
+            article.internal_links = [{
+                "url": f"{self.ARTICLE_URL_PREFIX}{articles[j].url_slug}",
+                "title": articles[j].title,
+                "anchor_text": articles[j].keyword_cluster.primary_keyword,
+                "relevance": round(score, 3)
+            } for j, score in best]
+            total += len(article.internal_links)
+        return total
+    
+    def opportunity_score(self, cluster: KeywordCluster) -> float:
+        """Search volume discounted by ranking difficulty, weighted by intent"""
+        return self.scorer.score(cluster)
+    
+    def plan_calendar(self, weeks: int, per_week: int = 1,
+                      clusters: Optional[List[KeywordCluster]] = None
+                      ) -> Tuple[List[Tuple[int, KeywordCluster]], List[KeywordCluster]]:
+        """Spread clusters over `weeks` with at most `per_week` articles per week.
+        
+        The `weeks * per_week` highest-opportunity clusters are selected with a bounded
+        heap (O(n log capacity), ties keep input order) and spaced evenly across the
+        horizon in descending opportunity. Returns (week, cluster) slots with 1-based
+        weeks, and the clusters that did not fit, in input order.
+        """
+        if clusters is None:
+            clusters, scores = self.store.clusters, self.scorer.scores()
+        else:
+            scores = [self.opportunity_score(c) for c in clusters]
+        capacity = max(0, weeks) * max(0, per_week)
+        if not clusters or capacity == 0:
+            return [], list(clusters)
+        
+        best = heapq.nlargest(capacity, range(len(clusters)), key=lambda i: (scores[i], -i))
+        selected = set(best)
+        scheduled = [clusters[i] for i in best]
+        backlog = [c for i, c in enumerate(clusters) if i not in selected]
+        slots = [(i * weeks // len(scheduled) + 1, c) for i, c in enumerate(scheduled)]
+        return slots, backlog
+    
+    def generate_content_calendar(self, months: int = 3, per_week: int = 1) -> List[Dict]:
         """Generate SEO content calendar"""
+        weeks = max(1, round(months * self.WEEKS_PER_MONTH))
+        slots, _ = self.plan_calendar(weeks, per_week)
         calendar = []
         
-        for month in range(months):
-            for cluster in self.KEYWORD_CLUSTERS[:4]:  # Top clusters per month
-                article = self.generate_article(cluster)
-                calendar.append({
-                    "month": month + 1,
-                    "publish_target": f"Week {month + 1}",
-                    "keyword": cluster.primary_keyword,
-                    "title": article.title,
-                    "pillar": cluster.pillar.value,
-                    "intent": cluster.intent.value,
-                    "word_count": self.CONTENT_TEMPLATES[cluster.intent]["word_count"],
-                    "status": "planned"
-                })
+        for week, cluster in slots:
+            article = self.generate_article(cluster)
+            calendar.append({
+                "month": min(months, int((week - 1) / self.WEEKS_PER_MONTH) + 1),
+                "publish_target": f"Week {week}",
+                "keyword": cluster.primary_keyword,
+                "title": article.title,
+                "pillar": cluster.pillar.value,
+                "intent": cluster.intent.value,
+                "word_count": self.CONTENT_TEMPLATES[cluster.intent]["word_count"],
+                "opportunity": round(self.opportunity_score(cluster)),
+                "status": "planned"
+            })
         
         return calendar
     
     def export_article_markdown(self, article: SEOArticle) -> str:
         """Export article as markdown with frontmatter"""
-        frontmatter = f"""---
-title: "{article.title}"
-meta_title: "{article.meta_title}"
-meta_description: "{article.meta_description}"
-slug: "{article.url_slug}"
-author: "{article.author}"
-reading_time: {article.reading_time}
-publish_date: "{article.publish_date}"
-keywords: {json.dumps([article.keyword_cluster.primary_keyword] + article.keyword_cluster.secondary_keywords)}
-pillar: "{article.keyword_cluster.pillar.value}"
-search_intent: "{article.keyword_cluster.intent.value}"
----
-
-"""
-        
-        content = f"# {article.title}\n\n"
-        content += f"{article.intro}\n\n"
-        
-        for section in article.sections:
-            content += f"## {section.heading}\n\n"
-            for point in section.content_outline:
-                content += f"- {point}\n"
-            content += f"\n[Target: {section.word_count_target} words]\n\n"
-            content += f"*Keywords: {', '.join(section.target_keywords)}*\n\n"
+        return render_article_markdown(article)
+    
+    def iter_feed_entries(self, base_url: str = SITE_URL) -> Iterator[Dict]:
+        """Sitemap/RSS entries for generated articles"""
+        for article in self.articles:
+            yield {
+                "loc": f"{base_url.rstrip('/')}{self.ARTICLE_URL_PREFIX}{article.url_slug}",
+                "lastmod": article.updated_date or article.publish_date,
+                "title": article.title,
+                "description": article.meta_description,
+            }
+    
+    def export_markdown_directory(self, output_dir: str, articles: Optional[List[SEOArticle]] = None,
+                                  workers: Optional[int] = None) -> Dict:
+        """Write each article to <output_dir>/<slug>.md
         
-        if article.faq_section:
-            content += "## Frequently Asked Questions\n\n"
-            for faq in article.faq_section:
-                content += f"**Q: {faq['question']}\n\n"
-                content += f"A:** {faq['answer']}\n\n"
+        Articles are rendered and hashed across a process pool (default: one worker
+        per CPU; a single worker runs inline). Only files whose content hash differs
+        from the build manifest are (atomically) rewritten, and articles no longer
+        exported are removed. Returns files/bytes written, seconds and the
+        added/changed/removed report. Articles sharing a slug (not generated by this
+        engine) get a hash suffix on their url_slug; an empty or invalid slug raises
+        ValueError before anything is written.
+        """
+        articles = self.articles if articles is None else articles
+        owners: Dict[str, Tuple] = {}
+        for article in articles:
+            slug = article.url_slug
+            if not slug or "/" in slug or os.sep in slug or slug.startswith("."):
+                raise ValueError(f"Invalid slug {slug!r} for article {article.title!r}")
+            cluster = article.keyword_cluster
+            identity = cluster.identity() if cluster else (article.id,)
+            seed = (f"{cluster.primary_keyword}|{cluster.pillar.value}|{cluster.intent.value}"
+                    if cluster else article.title)
+            article.url_slug = self._claim_slug(slug, identity, seed, owners)
+        workers = workers or os.cpu_count() or 1
+        os.makedirs(output_dir, exist_ok=True)
+        manifest = BuildManifest(output_dir, "seo")
+        jobs = [(a, output_dir, manifest.previous_hash(f"{a.url_slug}.md")) for a in articles]
         
-        content += f"## Conclusion\n\n{article.conclusion}"
+        start = time.perf_counter()
+        if workers <= 1 or len(jobs) < 2:
+            results = [_write_article_markdown(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunksize = max(1, len(jobs) // (workers * 4))
+                results = list(pool.map(_write_article_markdown, jobs, chunksize=chunksize))
         
-        return frontmatter + content
+        for relpath, sha256, size, wrote in results:
+            manifest.record(relpath, sha256, size, wrote)
+        report = manifest.finish()
+        return {
+            "files": sum(1 for r in results if r[3]),
+            "bytes": sum(r[2] for r in results if r[3]),
+            "seconds": time.perf_counter() - start,
+            "report": report,
+        }
     
     def export_content_strategy(self) -> str:
         """Export comprehensive content strategy"""
@@ -507,8 +1111,8 @@ search_intent: "{article.keyword_cluster.intent.value}"
         
         strategy.append("## Content Pillars")
         for pillar in ContentPillar:
-            clusters = [c for c in self.KEYWORD_CLUSTERS if c.pillar == pillar]
-            total_volume = sum(c.search_volume for c in clusters)
+            clusters = self.store.by_pillar(pillar)
+            total_volume = self.store.pillar_volume(pillar)
             strategy.append(f"\n### {pillar.value.replace('_', ' ').title()}")
             strategy.append(f"- Total Search Volume: {total_volume:,} monthly")
             strategy.append(f"- Target Clusters: {len(clusters)}")
@@ -529,14 +1133,17 @@ search_intent: "{article.keyword_cluster.intent.value}"
         
         return "\n".join(strategy)
     
+    def detect_cannibalization(self, threshold: float = 0.5) -> List[Tuple[KeywordCluster, KeywordCluster, float]]:
+        """Cluster pairs whose keyword sets overlap enough to compete in search"""
+        return CannibalizationDetector().find_pairs(self.store.clusters, threshold)
+    
     def get_cluster_by_pillar(self, pillar: ContentPillar) -> List[KeywordCluster]:
         """Get all keyword clusters for a pillar"""
-        return [c for c in self.KEYWORD_CLUSTERS if c.pillar == pillar]
+        return self.store.by_pillar(pillar)
     
     def get_high_opportunity_keywords(self, max_difficulty: int = 40) -> List[KeywordCluster]:
         """Find high-opportunity keywords (high volume, low difficulty)"""
-        opportunities = [c for c in self.KEYWORD_CLUSTERS if c.difficulty <= max_difficulty]
-        return sorted(opportunities, key=lambda x: x.search_volume, reverse=True)
+        return self.store.high_opportunity(max_difficulty)
 
 
 # CLI Interface
@@ -547,17 +1154,82 @@ if __name__ == "__main__":
     parser.add_argument("--generate", action="store_true", help="Generate articles for all clusters")
     parser.add_argument("--cluster", type=int, help="Generate specific cluster by index")
     parser.add_argument("--calendar", action="store_true", help="Generate content calendar")
+    parser.add_argument("--months", type=int, default=3, help="Calendar horizon in months")
+    parser.add_argument("--per-week", type=int, default=1, help="Calendar capacity: articles per week")
     parser.add_argument("--strategy", action="store_true", help="Export content strategy")
     parser.add_argument("--opportunities", action="store_true", help="Show high-opportunity keywords")
+    parser.add_argument("--top-k", type=int, help="Show the top K clusters per pillar by opportunity score")
+    parser.add_argument("--export", type=str, metavar="DIR",
+                        help="Generate every cluster's article and write each to DIR/<slug>.md")
+    parser.add_argument("--workers", type=int, help="Processes for --export (default: CPU count)")
+    parser.add_argument("--sitemap", type=str, metavar="DIR",
+                        help="Generate every cluster's article and write gzip sitemaps + RSS feed to DIR")
+    parser.add_argument("--with-blog", type=int, metavar="N", default=0,
+                        help="With --sitemap, also include N posts from the blog generator")
+    parser.add_argument("--site-url", type=str, default=SITE_URL, help="Base URL for --sitemap")
+    parser.add_argument("--links", type=int, nargs="?", const=5, metavar="N",
+                        help="Generate every cluster's article and show its top N internal links (default 5)")
+    parser.add_argument("--cannibalization", type=float, nargs="?", const=0.5, metavar="THRESHOLD",
+                        help="Report overlapping cluster pairs (estimated Jaccard >= THRESHOLD, default 0.5)")
     parser.add_argument("--pillar", choices=[p.value for p in ContentPillar], help="Filter by pillar")
+    parser.add_argument("--clusters", type=str, help="Load keyword clusters from a CSV or JSONL export")
     
     args = parser.parse_args()
     
-    engine = SEOContentEngine()
+    engine = SEOContentEngine(KeywordClusterStore.from_file(args.clusters) if args.clusters else None)
     
     if args.strategy:
         print(engine.export_content_strategy())
     
+    elif args.export:
+        for cluster in engine.store.clusters:
+            engine.generate_article(cluster)
+        engine.build_internal_links()
+        summary = engine.export_markdown_directory(args.export, workers=args.workers)
+        seconds = max(summary["seconds"], 1e-9)
+        print(f"Exported to {args.export}: {format_report(summary['report'])}")
+        print(f"Wrote {summary['files']:,} files ({summary['bytes']:,} bytes) in {summary['seconds']:.2f}s: "
+              f"{summary['files'] / seconds:,.0f} files/s, {summary['bytes'] / seconds / 1e6:,.1f} MB/s")
+    
+    elif args.sitemap:
+        from itertools import chain
+        for cluster in engine.store.clusters:
+            engine.generate_article(cluster)
+        sources = [engine.iter_feed_entries]
+        if args.with_blog:
+            sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "generators"))
+            from blog_generator import BlogPostGenerator
+            blog = BlogPostGenerator()
+            blog.generate_batch(args.with_blog)
+            sources.append(blog.iter_feed_entries)
+        paths = write_sitemaps(chain.from_iterable(src(args.site_url) for src in sources), args.sitemap, args.site_url)
+        items = write_rss(chain.from_iterable(src(args.site_url) for src in sources),
+                          os.path.join(args.sitemap, "feed.xml.gz"), link=args.site_url)
+        print(f"Sitemap index: {paths[0]} ({len(paths) - 1} shards)")
+        print(f"RSS feed: {os.path.join(args.sitemap, 'feed.xml.gz')} ({items} items)")
+    
+    elif args.links is not None:
+        for cluster in engine.store.clusters:
+            engine.generate_article(cluster)
+        total = engine.build_internal_links(args.links)
+        print(f"Built {total} internal links across {len(engine.articles)} articles:")
+        for article in engine.articles:
+            print(f"\n{article.title}")
+            for link in article.internal_links:
+                print(f"  -> {link['url']} ({link['relevance']})")
+    
+    elif args.cannibalization is not None:
+        pairs = engine.detect_cannibalization(args.cannibalization)
+        print(f"Potential keyword cannibalization ({len(pairs)} pairs):")
+        for a, b, similarity in pairs:
+            print(f"  {similarity:.2f}  {a.primary_keyword}  <->  {b.primary_keyword}")
+    
+    elif args.top_k:
+        for pillar, ranked in engine.scorer.top_k_per_pillar(args.top_k).items():
+            print(f"{pillar.value}:")
+            for score, c in ranked:
+                print(f"  {score:>10,.0f}  {c.primary_keyword} ({c.search_volume:,}/mo, difficulty: {c.difficulty}, {c.intent.value})")
+    
     elif args.opportunities:
         opportunities = engine.get_high_opportunity_keywords()
         print("High-Opportunity Keywords (High Volume, Low Difficulty):")
@@ -565,16 +1237,16 @@ if __name__ == "__main__":
             print(f"  {c.primary_keyword}: {c.search_volume:,}/mo, difficulty: {c.difficulty}")
     
     elif args.calendar:
-        calendar = engine.generate_content_calendar()
+        calendar = engine.generate_content_calendar(args.months, args.per_week)
         print(json.dumps(calendar, indent=2))
     
     elif args.cluster is not None:
-        cluster = engine.KEYWORD_CLUSTERS[args.cluster % len(engine.KEYWORD_CLUSTERS)]
+        cluster = engine.store.clusters[args.cluster % len(engine.store)]
         article = engine.generate_article(cluster)
         print(engine.export_article_markdown(article))
     
     elif args.generate:
-        for cluster in engine.KEYWORD_CLUSTERS[:3]:
+        for cluster in engine.store.clusters[:3]:
             article = engine.generate_article(cluster)
             print(f"Generated: {article.title}")
             print(f"  Keywords: {article.keyword_cluster.primary_keyword}")
@@ -590,7 +1262,7 @@ if __name__ == "__main__":
     
     else:
         print("SEO Content Engine - use --help for options")
-        print(f"\nAvailable keyword clusters: {len(engine.KEYWORD_CLUSTERS)}")
+        print(f"\nAvailable keyword clusters: {len(engine.store)}")
         print("Top clusters by volume:")
-        for c in sorted(engine.KEYWORD_CLUSTERS, key=lambda x: x.search_volume, reverse=True)[:5]:
+        for c in engine.store.top_by_volume(limit=5):
             print(f"  - {c.primary_keyword}: {c.search_volume:,}/mo")
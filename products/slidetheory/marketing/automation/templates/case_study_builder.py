@@ -5,9 +5,19 @@ from dataclasses import dataclass, field
 from typing import List, Optional, Dict
 from datetime import datetime
 from enum import Enum
+import hashlib
 import json
+import os
+import re
+import sys
 import uuid
 
+try:
+    from build_manifest import BuildManifest, format_report
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    from build_manifest import BuildManifest, format_report
+
 class Industry(Enum):
     TECHNOLOGY = "Technology"
     FINANCE = "Financial Services"
@@ -226,6 +236,8 @@ class CaseStudyBuilder:
         template = self.TEMPLATES.get(template_name, self.TEMPLATES["transformation"])
         
         cs = CaseStudy(
+            # Stable ids keep repeated exports of the same story byte-identical
+            id=data.get("id") or hashlib.sha256(data.get("title", "").encode("utf-8")).hexdigest()[:8],
             title=data.get("title", ""),
             subtitle=data.get("subtitle", ""),
             client_name=data.get("client_name", ""),
@@ -378,6 +390,20 @@ class CaseStudyBuilder:
             "tags": cs.tags
         }, indent=2)
     
+    def export_directory(self, studies: List[CaseStudy], output_dir: str, fmt: str = "full") -> Dict:
+        """Write studies to <output_dir>/<title-slug>.md|json, rewriting only changed files"""
+        os.makedirs(output_dir, exist_ok=True)
+        manifest = BuildManifest(output_dir, "case_studies")
+        for cs in studies:
+            slug = re.sub(r"[-\s]+", "-", re.sub(r"[^\w\s-]", "", cs.title.lower())).strip("-")[:60]
+            if fmt == "json":
+                manifest.write(f"{slug}.json", self.export_to_json(cs))
+            elif fmt == "onepager":
+                manifest.write(f"{slug}-onepager.md", self.generate_one_pager(cs))
+            else:
+                manifest.write(f"{slug}.md", self.generate_full_narrative(cs))
+        return manifest.finish()
+    
     def get_by_industry(self, industry: Industry) -> List[CaseStudy]:
         """Filter case studies by industry"""
         return [cs for cs in self.case_studies if cs.industry == industry]
@@ -396,6 +422,7 @@ if __name__ == "__main__":
     parser.add_argument("--format", choices=["full", "onepager", "json"], default="full", help="Output format")
     parser.add_argument("--list-templates", action="store_true", help="List available templates")
     parser.add_argument("--industry", choices=[i.value for i in Industry], help="Filter by industry")
+    parser.add_argument("--output", type=str, help="With --samples, write files to this directory instead of stdout")
     
     args = parser.parse_args()
     
@@ -406,6 +433,14 @@ if __name__ == "__main__":
             print(f"\n{key}: {template['name']}")
             print(f"  Best for: {template['best_for']}")
     
+    elif args.samples and args.output:
+        studies = builder.load_sample_data()
+        report = builder.export_directory(studies, args.output, args.format)
+        for status in ("added", "changed", "removed"):
+            for relpath in report[status]:
+                print(f"{status.capitalize()}: {os.path.join(args.output, relpath)}")
+        print(f"Exported to {args.output}: {format_report(report)}")
+    
     elif args.samples:
         studies = builder.load_sample_data()
         for cs in studies:
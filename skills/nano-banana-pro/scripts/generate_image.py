@@ -11,12 +11,338 @@ Generate images using Google's Nano Banana Pro (Gemini 3 Pro Image) API.
 
 Usage:
     uv run generate_image.py --prompt "your image description" --filename "output.png" [--resolution 1K|2K|4K] [--api-key KEY]
+    uv run generate_image.py --manifest images.jsonl [--concurrency 4] [--api-key KEY]
+
+Offline load testing (no network, synthetic images):
+    uv run generate_image.py --manifest images.jsonl --backend stub [--stub-latency 2.0] [--stub-error-rate 0.1]
+
+Quota-friendly parallel runs (shared across processes with --rate-limit-file):
+    uv run generate_image.py --manifest images.jsonl --rate-limit 20 [--max-retries 4]
+
+Web-ready derivatives (fit inside WxH, "Nw" for width only, "!" to crop to fill):
+    uv run generate_image.py ... --derivatives "320x320:webp,1200x630!:jpeg,800w:webp"
+
+Identical requests (model, prompt, resolution, input image bytes) are served from an
+on-disk cache (--cache-dir, --cache-max-mb); pass --no-cache to always call the API.
+
+Manifest (JSONL, one object per line, or CSV with a header row) fields:
+    prompt, filename, resolution (optional), input_image (optional)
+
+Batch progress is journaled to <manifest stem>.journal.jsonl; rerun with --resume to
+skip items that already completed and only retry failed or pending ones.
 """
 
 import argparse
+import base64
+import csv
+import hashlib
+import json
 import os
+import random
+import re
+import shutil
+import struct
 import sys
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import NamedTuple
+
+MODEL = "gemini-3-pro-image-preview"
+DEFAULT_CONCURRENCY = 4
+DEFAULT_CACHE_MAX_MB = 2048
+RESOLUTION_PIXELS = {"1K": 1024, "2K": 2048, "4K": 4096}
+DEFAULT_MAX_RETRIES = 4
+TRANSIENT_STATUS = {408, 429, 500, 502, 503, 504}
+TRANSIENT_STATUS_NAMES = {"RESOURCE_EXHAUSTED", "UNAVAILABLE", "DEADLINE_EXCEEDED"}
+TRANSIENT_STATUS_PATTERN = re.compile(r"\b(RESOURCE_EXHAUSTED|UNAVAILABLE|DEADLINE_EXCEEDED)\b")
+TRANSIENT_EXCEPTION_NAMES = {"TimeoutException", "NetworkError"}  # httpx base classes, matched without importing httpx
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_IEND = b"\x00\x00\x00\x00IEND\xaeB`\x82"
+PNG_COLOR_RGB = 2
+STREAM_CHUNK = 1 << 20  # Bytes written per call on the fast save path
+INPUT_MIME_TYPES = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+INPUT_JPEG_QUALITY = 92
+DERIVATIVE_FORMATS = {"png": "PNG", "jpeg": "JPEG", "jpg": "JPEG", "webp": "WEBP"}
+DERIVATIVE_SAVE_OPTIONS = {"PNG": {"optimize": True}, "JPEG": {"quality": 85, "optimize": True, "progressive": True},
+                           "WEBP": {"quality": 80, "method": 4}}
+DERIVATIVE_SPEC = re.compile(r"^(?:(\d+)x(\d+)(!?)|(\d+)w)(?::(\w+))?$")
+UMASK = os.umask(0o022)
+os.umask(UMASK)  # Read once at import; os.umask is process-wide and not thread-safe
+
+
+class GenerationError(Exception):
+    """Raised when a single image generation fails."""
+
+
+class InputPayload(NamedTuple):
+    """An encoded input image ready to upload."""
+    data: bytes
+    mime_type: str
+    size: tuple[int, int]
+
+
+class ImageCache:
+    """
+    Content-addressed, size-bounded LRU cache of generated PNGs and prepared inputs.
+
+    Images live at <root>/<key[:2]>/<key>.png and upload payloads at
+    <root>/inputs/<name[:2]>/<name>. A hit refreshes the entry's mtime, and eviction
+    removes the least recently used entries once max_bytes is exceeded.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total = None  # Lazily measured on first store
+
+    @staticmethod
+    def default_root() -> Path:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+        return Path(base) / "nano-banana-pro"
+
+    @staticmethod
+    def key(model: str, prompt: str, resolution: str, input_digest: str | None = None) -> str:
+        """Cache key of a request; input_digest is the sha256 of the input image file."""
+        digest = hashlib.sha256()
+        for field in (model, prompt, resolution, input_digest or ""):
+            digest.update(field.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.png"
+
+    def fetch(self, key: str, output_path: Path) -> bool:
+        """Hard-link (or copy) a cached image to output_path. Returns True on a hit."""
+        entry = self._entry(key)
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            return False
+        tmp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            os.link(entry, tmp_path)
+            if os.stat(tmp_path).st_mode & 0o777 != 0o666 & ~UMASK:
+                os.chmod(tmp_path, 0o666 & ~UMASK)  # Entries written by older versions were 0600
+        except OSError:
+            tmp_path.unlink(missing_ok=True)  # Never copy through a link to the entry
+            try:
+                shutil.copyfile(entry, tmp_path)
+            except FileNotFoundError:  # Evicted concurrently
+                return False
+        try:
+            os.replace(tmp_path, output_path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return True
+
+    def store(self, key: str, source_path: Path):
+        """Copy a freshly generated image into the cache, evicting LRU entries if needed."""
+        def copy(f):
+            with open(source_path, "rb") as src:
+                shutil.copyfileobj(src, f)
+        self._put(self._entry(key), copy)
+
+    def fetch_input(self, name: str) -> bytes | None:
+        """Return a cached upload payload, or None."""
+        entry = self.root / "inputs" / name[:2] / name
+        try:
+            os.utime(entry)
+            return entry.read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def store_input(self, name: str, data: bytes):
+        self._put(self.root / "inputs" / name[:2] / name, lambda f: f.write(data))
+
+    def _put(self, entry: Path, write):
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=entry.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            # Entries are hard-linked into place, so they need the outputs' regular permissions
+            os.chmod(tmp_path, 0o666 & ~UMASK)
+            os.replace(tmp_path, entry)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        with self._lock:
+            if self._total is None:
+                self._total = sum(p.stat().st_size for p in self._files())
+            else:
+                self._total += entry.stat().st_size
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _files(self):
+        yield from self.root.glob("*/*.png")
+        yield from self.root.glob("inputs/*/*")
+
+    def _evict(self):
+        entries = []
+        for path in self._files():
+            if path.suffix == ".tmp":
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        self._total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            self._total -= size
+
+
+# ============ RATE LIMITING & RETRIES ============
+class RateLimiter:
+    """
+    Token bucket of `rate` requests per minute with up to `burst` tokens.
+
+    Shared by every worker thread; with `state_file` the bucket lives in a small
+    JSON file guarded by flock, so concurrent processes share one quota.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, state_file: str | None = None):
+        self.per_second = rate / 60.0
+        self.burst = max(1, burst)
+        self.state_file = Path(state_file) if state_file else None
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = time.time()
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            wait = self._update(take=True)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def drain(self):
+        """Empty the bucket after a quota error so every worker backs off together."""
+        self._update(take=False)
+
+    def _update(self, take: bool) -> float:
+        with self._lock:
+            if self.state_file is None:
+                self._tokens, self._updated, wait = self._step(self._tokens, self._updated, take)
+                return wait
+            return self._update_file(take)
+
+    def _step(self, tokens: float, updated: float, take: bool) -> tuple[float, float, float]:
+        """Refill, then take one token (or drain). Returns (tokens, updated, seconds to wait)."""
+        now = time.time()
+        tokens = min(self.burst, tokens + max(0.0, now - updated) * self.per_second)
+        if not take:
+            return 0.0, now, 0.0
+        if tokens >= 1:
+            return tokens - 1, now, 0.0
+        return tokens, now, (1 - tokens) / self.per_second
+
+    def _update_file(self, take: bool) -> float:
+        import fcntl  # POSIX only; cross-process limiting is opt-in
+
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.state_file, "a+", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or "{}")
+                except ValueError:
+                    state = {}
+                tokens, updated, wait = self._step(
+                    state.get("tokens", float(self.burst)), state.get("updated", time.time()), take)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps({"tokens": tokens, "updated": updated}))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return wait
+
+
+def _error_status(error: Exception) -> tuple[int | None, str | None]:
+    """HTTP status code and API status name carried by an error, if any."""
+    code = None
+    for attr in ("code", "status_code"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            code = value
+            break
+    status = getattr(error, "status", None)
+    return code, status if isinstance(status, str) else None
+
+
+def is_transient_error(error: Exception) -> bool:
+    """
+    Quota, overload, timeout and connection errors are worth retrying; the rest are not.
+
+    Classified by exception type, then status code or status name; the message is
+    only searched for a status name when the error carries neither.
+    """
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    if any(cls.__name__ in TRANSIENT_EXCEPTION_NAMES for cls in type(error).__mro__):
+        return True
+    code, status = _error_status(error)
+    if code is not None:
+        return code in TRANSIENT_STATUS
+    if status is not None:
+        return status in TRANSIENT_STATUS_NAMES
+    return bool(TRANSIENT_STATUS_PATTERN.search(str(error)))
+
+
+def is_quota_error(error: Exception) -> bool:
+    code, status = _error_status(error)
+    if code is not None:
+        return code == 429
+    if status is not None:
+        return status == "RESOURCE_EXHAUSTED"
+    match = TRANSIENT_STATUS_PATTERN.search(str(error))
+    return bool(match) and match.group(1) == "RESOURCE_EXHAUSTED"
+
+
+class Retrier:
+    """Rate-limits calls and retries transient failures with full-jitter exponential backoff."""
+
+    def __init__(self, max_retries: int = 0, base_delay: float = 2.0, max_delay: float = 60.0,
+                 limiter: RateLimiter | None = None):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.limiter = limiter
+
+    def call(self, fn, log=print):
+        attempt = 0
+        while True:
+            if self.limiter is not None:
+                self.limiter.acquire()
+            try:
+                return fn()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_transient_error(e):
+                    raise
+                if self.limiter is not None and is_quota_error(e):
+                    self.limiter.drain()
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                attempt += 1
+                log(f"Transient error ({e}); retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
 
 
 def get_api_key(provided_key: str | None) -> str | None:
@@ -26,18 +352,574 @@ def get_api_key(provided_key: str | None) -> str | None:
     return os.environ.get("GEMINI_API_KEY")
 
 
+def auto_resolution(width: int, height: int) -> str:
+    """Map an input image size to the closest output resolution."""
+    max_dim = max(width, height)
+    if max_dim >= 3000:
+        return "4K"
+    elif max_dim >= 1500:
+        return "2K"
+    return "1K"
+
+
+# ============ BACKENDS ============
+class GeminiBackend:
+    """Nano Banana Pro via google-genai."""
+
+    name = "gemini"
+
+    def __init__(self, api_key: str):
+        # Import here after checking API key to avoid slow import on error
+        from google import genai
+        self.model = MODEL
+        self.client = genai.Client(api_key=api_key)
+
+    def generate(self, prompt: str, resolution: str,
+                 input_image: InputPayload | None = None) -> tuple[bytes | str | None, list[str]]:
+        """Return (image bytes or base64 text, or None; text parts) for one request."""
+        from google.genai import types
+
+        if input_image is not None:
+            contents = [types.Part.from_bytes(data=input_image.data, mime_type=input_image.mime_type), prompt]
+        else:
+            contents = prompt
+        response = self.client.models.generate_content(
+            model=self.model,
+            contents=contents,
+            config=types.GenerateContentConfig(
+                response_modalities=["TEXT", "IMAGE"],
+                image_config=types.ImageConfig(
+                    image_size=resolution
+                )
+            )
+        )
+
+        image_data, texts = None, []
+        for part in response.parts:
+            if part.text is not None:
+                texts.append(part.text)
+            elif part.inline_data is not None and image_data is None:
+                # Usually bytes; base64 text is decoded while streaming to disk
+                image_data = part.inline_data.data
+        return image_data, texts
+
+
+class StubBackend:
+    """
+    Deterministic local backend for offline load testing.
+
+    Returns a synthetic PNG of the requested resolution (colour derived from the prompt)
+    after `latency` seconds; fails a seeded `error_rate` fraction of calls with a
+    simulated quota error.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.model = "stub"
+        self.latency = latency
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def generate(self, prompt: str, resolution: str,
+                 input_image: InputPayload | None = None) -> tuple[bytes | None, list[str]]:
+        with self._lock:
+            fail = self._rng.random() < self.error_rate
+        if self.latency > 0:
+            time.sleep(self.latency)
+        if fail:
+            raise RuntimeError("429 RESOURCE_EXHAUSTED (simulated by stub backend)")
+
+        size = RESOLUTION_PIXELS[resolution]
+        if input_image is not None:
+            # Keep the input's aspect ratio, long edge at the requested resolution
+            width, height = input_image.size
+            scale = size / max(width, height)
+            width, height = max(1, round(width * scale)), max(1, round(height * scale))
+        else:
+            width = height = size
+        rgb = hashlib.sha256(prompt.encode("utf-8")).digest()[:3]
+        return encode_solid_png(width, height, rgb), [f"stub image {width}x{height}"]
+
+
+BACKENDS = {"gemini": GeminiBackend, "stub": StubBackend}
+
+
+def encode_solid_png(width: int, height: int, rgb: bytes) -> bytes:
+    """Encode a solid-colour 8-bit RGB PNG using only the standard library."""
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    row = b"\x00" + rgb * width  # Filter type 0 (None) per scanline
+    raw = row * height
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(raw, 1)) + chunk(b"IEND", b""))
+
+
+def _payload_chunks(image_data: bytes | str):
+    """Yield an image payload in STREAM_CHUNK pieces without materialising a decoded copy."""
+    if isinstance(image_data, str):
+        for start in range(0, len(image_data), STREAM_CHUNK // 3 * 4):
+            yield base64.b64decode(image_data[start:start + STREAM_CHUNK // 3 * 4])
+    else:
+        view = memoryview(image_data)
+        for start in range(0, len(view), STREAM_CHUNK):
+            yield view[start:start + STREAM_CHUNK]
+
+
+def is_rgb_png(image_data: bytes | str) -> bool:
+    """True for a complete 8-bit RGB PNG, which can be written to disk as-is."""
+    if isinstance(image_data, str):
+        # Chunked decoding needs unbroken, padded base64
+        if len(image_data) < 64 or len(image_data) % 4 or any(c in image_data for c in " \r\n"):
+            return False
+        header = base64.b64decode(image_data[:36])
+        tail = base64.b64decode(image_data[-24:])[-len(PNG_IEND):]
+    else:
+        header, tail = image_data[:26], image_data[-len(PNG_IEND):]
+    if len(header) < 26:  # Truncated: let PIL report it
+        return False
+    return (header[:8] == PNG_SIGNATURE and header[12:16] == b"IHDR"
+            and header[24] == 8 and header[25] == PNG_COLOR_RGB and tail == PNG_IEND)
+
+
+def save_image_bytes(image_data: bytes | str, output_path: Path):
+    """
+    Save an image payload (bytes or base64 text) as an RGB PNG.
+
+    8-bit RGB PNGs are streamed to disk untouched; anything else is decoded and
+    converted with PIL.
+    """
+    if is_rgb_png(image_data):
+        # Temp file + rename never writes through a hard link into the response cache
+        fd, tmp_path = tempfile.mkstemp(dir=output_path.parent, prefix=f".{output_path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in _payload_chunks(image_data):
+                    f.write(chunk)
+            os.chmod(tmp_path, 0o666 & ~UMASK)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        return
+
+    from io import BytesIO
+    from PIL import Image as PILImage
+
+    if isinstance(image_data, str):
+        image_data = base64.b64decode(image_data)
+    image = PILImage.open(BytesIO(image_data))
+
+    # Never write through a hard link into the response cache
+    if output_path.exists() and output_path.stat().st_nlink > 1:
+        output_path.unlink()
+
+    # Ensure RGB mode for PNG (convert RGBA to RGB with white background if needed)
+    if image.mode == 'RGBA':
+        rgb_image = PILImage.new('RGB', image.size, (255, 255, 255))
+        rgb_image.paste(image, mask=image.split()[3])
+        rgb_image.save(str(output_path), 'PNG')
+    elif image.mode == 'RGB':
+        image.save(str(output_path), 'PNG')
+    else:
+        image.convert('RGB').save(str(output_path), 'PNG')
+
+
+def prepare_input_image(source: bytes, source_digest: str, resolution: str,
+                        cache: ImageCache | None = None, log=print) -> InputPayload:
+    """
+    Shrink an input image to the smallest size that still covers the output resolution.
+
+    Inputs already within the output's long edge are uploaded untouched; larger ones are
+    resized and re-encoded (JPEG, or PNG when there is transparency). Prepared payloads
+    are cached by source digest and target size.
+    """
+    from io import BytesIO
+    from PIL import Image as PILImage
+
+    with PILImage.open(BytesIO(source)) as image:
+        width, height = image.size
+        edge = RESOLUTION_PIXELS[resolution]
+        if max(width, height) <= edge and image.format in INPUT_MIME_TYPES:
+            return InputPayload(source, INPUT_MIME_TYPES[image.format], image.size)
+
+        scale = min(1.0, edge / max(width, height))
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        fmt = "PNG" if image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info else "JPEG"
+        name = f"{source_digest}-{size[0]}x{size[1]}.{fmt.lower()}"
+        if cache is not None:
+            data = cache.fetch_input(name)
+            if data is not None:
+                return InputPayload(data, INPUT_MIME_TYPES[fmt], size)
+
+        converted = image.convert("RGBA" if fmt == "PNG" else "RGB")
+        if converted.size != size:
+            converted = converted.resize(size, PILImage.LANCZOS)
+        buffer = BytesIO()
+        if fmt == "JPEG":
+            converted.save(buffer, "JPEG", quality=INPUT_JPEG_QUALITY, optimize=True)
+        else:
+            converted.save(buffer, "PNG", optimize=True)
+        data = buffer.getvalue()
+
+    log(f"Prepared input: {width}x{height} -> {size[0]}x{size[1]} {fmt} ({len(data) // 1024} KB)")
+    if cache is not None:
+        try:
+            cache.store_input(name, data)
+        except OSError as e:
+            log(f"Warning: could not cache input payload: {e}")
+    return InputPayload(data, INPUT_MIME_TYPES[fmt], size)
+
+
+def generate_image(backend, prompt: str, filename: str, resolution: str | None = None,
+                   input_image: str | None = None, log=print, cache: ImageCache | None = None,
+                   retrier: Retrier | None = None) -> Path:
+    """
+    Generate (or edit) one image and save it as PNG.
+
+    resolution=None means auto: 1K, or matched to the input image size when editing.
+    With a cache, identical requests are served from disk without calling the API;
+    with a retrier, backend calls are rate-limited and transient errors retried.
+    Raises GenerationError on any failure.
+    """
+    from io import BytesIO
+    from PIL import Image as PILImage
+
+    # Set up output path
+    output_path = Path(filename)
+    try:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+    except OSError as e:
+        raise GenerationError(f"Error creating output directory: {e}") from e
+
+    # Load input image if provided
+    input_bytes = input_digest = None
+    output_resolution = resolution or "1K"
+    if input_image:
+        try:
+            input_bytes = Path(input_image).read_bytes()
+            with PILImage.open(BytesIO(input_bytes)) as header:
+                width, height = header.size
+        except Exception as e:
+            raise GenerationError(f"Error loading input image: {e}") from e
+        input_digest = hashlib.sha256(input_bytes).hexdigest()
+        log(f"Loaded input image: {input_image}")
+
+        # Auto-detect resolution if not explicitly set by user
+        if resolution is None:
+            output_resolution = auto_resolution(width, height)
+            log(f"Auto-detected resolution: {output_resolution} (from input {width}x{height})")
+
+    cache_key = None
+    if cache is not None:
+        cache_key = ImageCache.key(backend.model, prompt, output_resolution, input_digest)
+        try:
+            hit = cache.fetch(cache_key, output_path)
+        except OSError as e:
+            raise GenerationError(f"Error writing cached image to {output_path}: {e}") from e
+        if hit:
+            log(f"Cache hit: {cache_key[:12]}")
+            return output_path.resolve()
+
+    payload = None
+    if input_bytes is not None:
+        try:
+            payload = prepare_input_image(input_bytes, input_digest, output_resolution, cache, log)
+        except Exception as e:
+            raise GenerationError(f"Error loading input image: {e}") from e
+        log(f"Editing image with resolution {output_resolution}...")
+    else:
+        log(f"Generating image with resolution {output_resolution}...")
+
+    try:
+        retrier = retrier or Retrier()
+        image_data, texts = retrier.call(
+            lambda: backend.generate(prompt, output_resolution, payload), log)
+        for text in texts:
+            log(f"Model response: {text}")
+        if image_data is not None:
+            save_image_bytes(image_data, output_path)
+    except Exception as e:
+        raise GenerationError(f"Error generating image: {e}") from e
+
+    if image_data is None:
+        raise GenerationError("Error: No image was generated in the response.")
+    if cache_key is not None:
+        try:
+            cache.store(cache_key, output_path)
+        except OSError as e:
+            log(f"Warning: could not cache image: {e}")
+    return output_path.resolve()
+
+
+# ============ DERIVATIVES ============
+def parse_derivative_specs(text: str) -> list[dict]:
+    """Parse "320x320:webp,1200x630!:jpeg,800w" into derivative specs."""
+    specs = []
+    for raw in text.split(","):
+        raw = raw.strip()
+        if not raw:
+            continue
+        match = DERIVATIVE_SPEC.match(raw.lower())
+        if not match or (match.group(5) and match.group(5) not in DERIVATIVE_FORMATS):
+            raise ValueError(f"Invalid derivative '{raw}' (expected WxH[!][:png|jpeg|webp] or Nw[:format])")
+        width, height, crop, width_only, fmt = match.groups()
+        spec = {
+            "width": int(width or width_only),
+            "height": int(height) if height else None,
+            "crop": bool(crop),
+            "format": DERIVATIVE_FORMATS[fmt or "png"],
+        }
+        if spec in specs:
+            raise ValueError(f"Duplicate derivative '{raw}'")
+        specs.append(spec)
+    return specs
+
+
+def make_derivatives(source: str, specs: list[dict]) -> dict:
+    """
+    Produce every derivative of one image from a single decode.
+
+    Files are written next to the source as <stem>-<W>x<H>.<ext>, and a sidecar
+    <stem>.derivatives.json lists each file with its dimensions and byte size.
+    Specs that resolve to the same size and format as an earlier one (e.g. 800w and
+    800x800 on a square source) are skipped rather than overwriting it. Runs in a
+    worker process in batch mode.
+    """
+    from PIL import Image as PILImage, ImageOps
+
+    source_path = Path(source)
+    with PILImage.open(source_path) as opened:
+        image = opened.convert("RGB")
+
+    produced = []
+    seen = set()
+    for spec in specs:
+        if spec["crop"]:
+            variant = ImageOps.fit(image, (spec["width"], spec["height"]), PILImage.LANCZOS)
+        else:
+            variant = image.copy()
+            variant.thumbnail((spec["width"], spec["height"] or image.height), PILImage.LANCZOS)
+        ext = "jpg" if spec["format"] == "JPEG" else spec["format"].lower()
+        if (variant.width, variant.height, ext) in seen:
+            continue
+        seen.add((variant.width, variant.height, ext))
+        path = source_path.with_name(f"{source_path.stem}-{variant.width}x{variant.height}.{ext}")
+        variant.save(path, spec["format"], **DERIVATIVE_SAVE_OPTIONS[spec["format"]])
+        produced.append({"path": str(path), "format": spec["format"].lower(),
+                         "width": variant.width, "height": variant.height, "bytes": path.stat().st_size})
+
+    sidecar = {"source": str(source_path), "width": image.width, "height": image.height,
+               "derivatives": produced}
+    sidecar_path = source_path.with_name(f"{source_path.stem}.derivatives.json")
+    sidecar_path.write_text(json.dumps(sidecar, indent=2) + "\n", encoding="utf-8")
+    return sidecar
+
+
+# ============ BATCH MODE ============
+def load_manifest(path: str) -> list[dict]:
+    """Load batch items from a JSONL or CSV manifest, normalising resolution case."""
+    manifest_path = Path(path)
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        if manifest_path.suffix.lower() == ".csv":
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    items = []
+    for i, row in enumerate(rows, 1):
+        if not row.get("prompt") or not row.get("filename"):
+            raise ValueError(f"{path}: item {i} needs 'prompt' and 'filename'")
+        resolution = str(row.get("resolution") or "").strip().upper() or None
+        if resolution is not None and resolution not in RESOLUTION_PIXELS:
+            raise ValueError(f"{path}: item {i} has resolution {row['resolution']!r} "
+                             f"(expected one of {', '.join(RESOLUTION_PIXELS)})")
+        items.append({
+            "prompt": row["prompt"],
+            "filename": row["filename"],
+            "resolution": resolution,
+            "input_image": row.get("input_image") or None,
+        })
+    return items
+
+
+class BatchJournal:
+    """
+    Append-only JSONL record of batch progress, fsynced after every item.
+
+    Each line holds an item key (hash of its manifest fields and the derivative specs),
+    status, output path and output sha256. An item is only journaled "ok" once its
+    derivatives are written too. With resume=True the existing journal is read and
+    extended; the latest line per item wins, and a torn final line from a crash is ignored.
+    """
+
+    def __init__(self, path: str, resume: bool = False, derivatives: list[dict] | None = None):
+        self.path = Path(path)
+        self.derivatives = derivatives
+        self.completed = {}
+        if resume and self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record.get("status") == "ok":
+                        self.completed[record["key"]] = record
+                    else:
+                        self.completed.pop(record.get("key"), None)
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+
+    def item_key(self, item: dict) -> str:
+        if self.derivatives:
+            item = dict(item, derivatives=self.derivatives)
+        return hashlib.sha256(json.dumps(item, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def completed_result(self, item: dict) -> dict | None:
+        """The journaled result for an item whose output is still on disk unchanged, else None."""
+        record = self.completed.get(self.item_key(item))
+        if record is None:
+            return None
+        try:
+            if file_sha256(record["path"]) != record["sha256"]:
+                return None
+        except OSError:
+            return None
+        return record
+
+    def record(self, item: dict, result: dict):
+        entry = {"key": self.item_key(item), "filename": item["filename"], "status": result["status"],
+                 "path": result.get("path"), "error": result.get("error"), "time": time.time()}
+        if result["status"] == "ok":
+            entry["sha256"] = file_sha256(result["path"])
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(STREAM_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def run_batch(backend, items: list[dict], concurrency: int = DEFAULT_CONCURRENCY,
+              cache: ImageCache | None = None, retrier: Retrier | None = None,
+              derivatives: list[dict] | None = None, journal: BatchJournal | None = None) -> list[dict]:
+    """
+    Generate every manifest item with one shared backend and a bounded thread pool.
+
+    Derivatives of finished images are built on a process pool while later API
+    requests are still in flight. With a journal, every outcome is recorded as it
+    happens (for successful items, once their derivatives are done) and items it
+    already lists as completed are skipped. Prints one status
+    line per item as it finishes, then aggregate throughput. Returns one result dict
+    per item, in manifest order.
+    """
+    results = [None] * len(items)
+    print_lock = threading.Lock()
+    done = 0
+
+    pending = []
+    for index, item in enumerate(items):
+        record = journal.completed_result(item) if journal is not None else None
+        if record is None:
+            pending.append(index)
+        else:
+            results[index] = {"filename": item["filename"], "status": "ok", "path": record["path"],
+                              "seconds": 0.0, "messages": [], "resumed": True}
+    if len(pending) < len(items):
+        print(f"Resuming: {len(items) - len(pending)} completed items skipped, {len(pending)} to go")
+
+    def run_item(index: int) -> dict:
+        item = items[index]
+        start = time.monotonic()
+        messages = []
+        try:
+            path = generate_image(backend, item["prompt"], item["filename"], item["resolution"],
+                                  item["input_image"], log=messages.append, cache=cache,
+                                  retrier=retrier)
+            return {"filename": item["filename"], "status": "ok", "path": str(path),
+                    "seconds": time.monotonic() - start, "messages": messages}
+        except GenerationError as e:
+            return {"filename": item["filename"], "status": "error", "error": str(e),
+                    "seconds": time.monotonic() - start, "messages": messages}
+        except Exception as e:  # One bad item must not take down the batch
+            return {"filename": item["filename"], "status": "error", "error": f"Unexpected error: {e!r}",
+                    "seconds": time.monotonic() - start, "messages": messages}
+
+    batch_start = time.monotonic()
+    derivative_pool = ProcessPoolExecutor() if derivatives else None
+    derivative_futures = {}
+    derivative_images = 0
+    produced = 0
+
+    def finish_derivatives(future):
+        nonlocal produced
+        index = derivative_futures.pop(future)
+        result = results[index]
+        try:
+            result["derivatives"] = future.result()["derivatives"]
+            produced += len(result["derivatives"])
+        except Exception as e:
+            result["status"] = "error"
+            result["error"] = f"Error creating derivatives: {e}"
+            print(f"Derivatives failed for {result['path']}: {e}", file=sys.stderr)
+        if journal is not None:
+            journal.record(items[index], result)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {executor.submit(run_item, i): i for i in pending}
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            if derivative_pool is not None and result["status"] == "ok":
+                # Journaled once the derivatives exist, so --resume never skips half-finished items
+                derivative_futures[derivative_pool.submit(make_derivatives, result["path"], derivatives)] = (
+                    futures[future])
+                derivative_images += 1
+            elif journal is not None:
+                journal.record(items[futures[future]], result)
+            for finished in [f for f in derivative_futures if f.done()]:
+                finish_derivatives(finished)
+            with print_lock:
+                done += 1
+                detail = result.get("path") or result.get("error")
+                print(f"[{done}/{len(pending)}] {result['status']:<5} {result['seconds']:6.1f}s  {detail}")
+
+    if derivative_pool is not None:
+        for future in list(derivative_futures):
+            finish_derivatives(future)
+        derivative_pool.shutdown()
+        print(f"Derivatives: {produced} files for {derivative_images} images")
+
+    elapsed = time.monotonic() - batch_start
+    succeeded = sum(1 for r in results if r["status"] == "ok")
+    generated = sum(1 for i in pending if results[i]["status"] == "ok")
+    rate = generated / elapsed * 60 if elapsed > 0 else 0.0
+    print(f"\nBatch complete: {succeeded}/{len(items)} succeeded in {elapsed:.1f}s "
+          f"({rate:.1f} images/min, concurrency {concurrency})")
+    return results
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Generate images using Nano Banana Pro (Gemini 3 Pro Image)"
     )
     parser.add_argument(
         "--prompt", "-p",
-        required=True,
         help="Image description/prompt"
     )
     parser.add_argument(
         "--filename", "-f",
-        required=True,
         help="Output filename (e.g., sunset-mountains.png)"
     )
     parser.add_argument(
@@ -47,120 +929,173 @@ def main():
     parser.add_argument(
         "--resolution", "-r",
         choices=["1K", "2K", "4K"],
-        default="1K",
-        help="Output resolution: 1K (default), 2K, or 4K"
+        default=None,
+        help="Output resolution: 1K (default), 2K, or 4K; auto-detected from --input-image if omitted"
     )
     parser.add_argument(
         "--api-key", "-k",
         help="Gemini API key (overrides GEMINI_API_KEY env var)"
     )
+    parser.add_argument(
+        "--manifest", "-m",
+        help="Batch mode: JSONL or CSV manifest of prompt, filename, resolution, input_image"
+    )
+    parser.add_argument(
+        "--concurrency", "-c",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Batch mode: max concurrent requests (default: {DEFAULT_CONCURRENCY})"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=sorted(BACKENDS),
+        default="gemini",
+        help="Image backend: gemini (default) or stub (synthetic images, no network)"
+    )
+    parser.add_argument(
+        "--stub-latency",
+        type=float,
+        default=0.0,
+        help="Stub backend: seconds to sleep per request (default: 0)"
+    )
+    parser.add_argument(
+        "--stub-error-rate",
+        type=float,
+        default=0.0,
+        help="Stub backend: fraction of requests that fail with a simulated quota error (default: 0)"
+    )
+    parser.add_argument(
+        "--stub-seed",
+        type=int,
+        default=0,
+        help="Stub backend: random seed for simulated failures (default: 0)"
+    )
+    parser.add_argument(
+        "--journal",
+        help="Batch mode: progress journal path (default: <manifest stem>.journal.jsonl next to the manifest)"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Batch mode: skip items the journal lists as completed; retry failed and pending ones"
+    )
+    parser.add_argument(
+        "--derivatives",
+        help="Also write resized copies, e.g. '320x320:webp,1200x630!:jpeg,800w' (WxH fits inside, ! crops to fill)"
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        help="Max requests per minute, shared by all workers (default: unlimited)"
+    )
+    parser.add_argument(
+        "--rate-burst",
+        type=int,
+        default=1,
+        help="Requests allowed back-to-back before --rate-limit pacing applies (default: 1)"
+    )
+    parser.add_argument(
+        "--rate-limit-file",
+        help="Share the --rate-limit bucket across processes through this lock file (POSIX)"
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help=f"Retries for transient errors (429/5xx/timeouts) with jittered backoff (default: {DEFAULT_MAX_RETRIES})"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the API; do not read or write the response cache"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Response cache directory (default: $XDG_CACHE_HOME/nano-banana-pro or ~/.cache/nano-banana-pro)"
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=DEFAULT_CACHE_MAX_MB,
+        help=f"Evict least recently used cache entries above this size (default: {DEFAULT_CACHE_MAX_MB})"
+    )
 
     args = parser.parse_args()
 
-    # Get API key
-    api_key = get_api_key(args.api_key)
-    if not api_key:
-        print("Error: No API key provided.", file=sys.stderr)
-        print("Please either:", file=sys.stderr)
-        print("  1. Provide --api-key argument", file=sys.stderr)
-        print("  2. Set GEMINI_API_KEY environment variable", file=sys.stderr)
-        sys.exit(1)
-
-    # Import here after checking API key to avoid slow import on error
-    from google import genai
-    from google.genai import types
-    from PIL import Image as PILImage
-
-    # Initialise client
-    client = genai.Client(api_key=api_key)
+    if not args.manifest and not (args.prompt and args.filename):
+        parser.error("--prompt and --filename are required (or use --manifest)")
+    if args.resume and not args.manifest:
+        parser.error("--resume requires --manifest")
 
-    # Set up output path
-    output_path = Path(args.filename)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+    derivatives = None
+    if args.derivatives:
+        try:
+            derivatives = parse_derivative_specs(args.derivatives)
+        except ValueError as e:
+            parser.error(str(e))
 
-    # Load input image if provided
-    input_image = None
-    output_resolution = args.resolution
-    if args.input_image:
-        try:
-            input_image = PILImage.open(args.input_image)
-            print(f"Loaded input image: {args.input_image}")
-
-            # Auto-detect resolution if not explicitly set by user
-            if args.resolution == "1K":  # Default value
-                # Map input image size to resolution
-                width, height = input_image.size
-                max_dim = max(width, height)
-                if max_dim >= 3000:
-                    output_resolution = "4K"
-                elif max_dim >= 1500:
-                    output_resolution = "2K"
-                else:
-                    output_resolution = "1K"
-                print(f"Auto-detected resolution: {output_resolution} (from input {width}x{height})")
-        except Exception as e:
-            print(f"Error loading input image: {e}", file=sys.stderr)
+    # Load the manifest before touching the API so bad input fails fast
+    items = None
+    if args.manifest:
+        try:
+            items = load_manifest(args.manifest)
+        except (OSError, ValueError) as e:
+            print(f"Error loading manifest: {e}", file=sys.stderr)
             sys.exit(1)
 
-    # Build contents (image first if editing, prompt only if generating)
-    if input_image:
-        contents = [input_image, args.prompt]
-        print(f"Editing image with resolution {output_resolution}...")
+    # Initialise backend (shared by every request in batch mode)
+    if args.backend == "stub":
+        backend = StubBackend(args.stub_latency, args.stub_error_rate, args.stub_seed)
     else:
-        contents = args.prompt
-        print(f"Generating image with resolution {output_resolution}...")
+        # Get API key
+        api_key = get_api_key(args.api_key)
+        if not api_key:
+            print("Error: No API key provided.", file=sys.stderr)
+            print("Please either:", file=sys.stderr)
+            print("  1. Provide --api-key argument", file=sys.stderr)
+            print("  2. Set GEMINI_API_KEY environment variable", file=sys.stderr)
+            sys.exit(1)
+        backend = GeminiBackend(api_key)
 
-    try:
-        response = client.models.generate_content(
-            model="gemini-3-pro-image-preview",
-            contents=contents,
-            config=types.GenerateContentConfig(
-                response_modalities=["TEXT", "IMAGE"],
-                image_config=types.ImageConfig(
-                    image_size=output_resolution
-                )
-            )
-        )
+    cache = None
+    if not args.no_cache:
+        cache = ImageCache(Path(args.cache_dir) if args.cache_dir else ImageCache.default_root(),
+                           args.cache_max_mb * 1024 * 1024)
 
-        # Process response and convert to PNG
-        image_saved = False
-        for part in response.parts:
-            if part.text is not None:
-                print(f"Model response: {part.text}")
-            elif part.inline_data is not None:
-                # Convert inline data to PIL Image and save as PNG
-                from io import BytesIO
+    limiter = None
+    if args.rate_limit:
+        limiter = RateLimiter(args.rate_limit, args.rate_burst, args.rate_limit_file)
+    retrier = Retrier(max(0, args.max_retries), limiter=limiter)
 
-                # inline_data.data is already bytes, not base64
-                image_data = part.inline_data.data
-                if isinstance(image_data, str):
-                    # If it's a string, it might be base64
-                    import base64
-                    image_data = base64.b64decode(image_data)
-
-                image = PILImage.open(BytesIO(image_data))
-
-                # Ensure RGB mode for PNG (convert RGBA to RGB with white background if needed)
-                if image.mode == 'RGBA':
-                    rgb_image = PILImage.new('RGB', image.size, (255, 255, 255))
-                    rgb_image.paste(image, mask=image.split()[3])
-                    rgb_image.save(str(output_path), 'PNG')
-                elif image.mode == 'RGB':
-                    image.save(str(output_path), 'PNG')
-                else:
-                    image.convert('RGB').save(str(output_path), 'PNG')
-                image_saved = True
-
-        if image_saved:
-            full_path = output_path.resolve()
-            print(f"\nImage saved: {full_path}")
-        else:
-            print("Error: No image was generated in the response.", file=sys.stderr)
+    if items is not None:
+        manifest_path = Path(args.manifest)
+        journal = BatchJournal(args.journal or manifest_path.with_name(f"{manifest_path.stem}.journal.jsonl"),
+                               resume=args.resume, derivatives=derivatives)
+        try:
+            results = run_batch(backend, items, args.concurrency, cache, retrier, derivatives, journal)
+        finally:
+            journal.close()
+        if any(r["status"] != "ok" for r in results):
             sys.exit(1)
+        return
 
-    except Exception as e:
-        print(f"Error generating image: {e}", file=sys.stderr)
+    try:
+        full_path = generate_image(backend, args.prompt, args.filename, args.resolution, args.input_image,
+                                   cache=cache, retrier=retrier)
+    except GenerationError as e:
+        print(e, file=sys.stderr)
         sys.exit(1)
+    print(f"\nImage saved: {full_path}")
+
+    if derivatives:
+        try:
+            sidecar = make_derivatives(str(full_path), derivatives)
+        except Exception as e:
+            print(f"Error creating derivatives: {e}", file=sys.stderr)
+            sys.exit(1)
+        for derivative in sidecar["derivatives"]:
+            print(f"Derivative: {derivative['path']} ({derivative['width']}x{derivative['height']}, "
+                  f"{derivative['bytes']} bytes)")
 
 
 if __name__ == "__main__":
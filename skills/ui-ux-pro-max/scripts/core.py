@@ -6,6 +6,7 @@ UI/UX Pro Max Core - BM25 search engine for UI/UX style guides
 
 import csv
 import re
+from bisect import bisect_left
 from pathlib import Path
 from math import log
 from collections import defaultdict
@@ -91,6 +92,33 @@ _STACK_COLS = {
 
 AVAILABLE_STACKS = list(STACK_CONFIG.keys())
 
+# Name column offered as whole-phrase completions by suggest() ("stack" covers all stacks)
+SUGGEST_COLS = {
+    "style": "Style Category",
+    "color": "Product Type",
+    "chart": "Data Type",
+    "landing": "Pattern Name",
+    "product": "Product Type",
+    "ux": "Category",
+    "typography": "Font Pairing Name",
+    "icons": "Icon Name",
+    "react": "Category",
+    "web": "Category",
+    "stack": "Category"
+}
+MAX_SUGGESTIONS = 10
+
+# colors.csv hex columns covered by the precomputed WCAG contrast table
+COLOR_ROLES = {
+    "primary": "Primary (Hex)",
+    "secondary": "Secondary (Hex)",
+    "cta": "CTA (Hex)",
+    "background": "Background (Hex)",
+    "text": "Text (Hex)"
+}
+WCAG_AA_TEXT = 4.5  # Normal body text
+WCAG_AA_UI = 3.0    # Large text and UI components (e.g. CTA buttons)
+
 
 # ============ BM25 IMPLEMENTATION ============
 class BM25:
@@ -100,6 +128,7 @@ class BM25:
         self.k1 = k1
         self.b = b
         self.corpus = []
+        self.term_freqs = []
         self.doc_lengths = []
         self.avgdl = 0
         self.idf = {}
@@ -121,11 +150,12 @@ class BM25:
         self.avgdl = sum(self.doc_lengths) / self.N
 
         for doc in self.corpus:
-            seen = set()
+            term_freqs = defaultdict(int)
             for word in doc:
-                if word not in seen:
-                    self.doc_freqs[word] += 1
-                    seen.add(word)
+                term_freqs[word] += 1
+            self.term_freqs.append(term_freqs)
+            for word in term_freqs:
+                self.doc_freqs[word] += 1
 
         for word, freq in self.doc_freqs.items():
             self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
@@ -135,16 +165,13 @@ class BM25:
         query_tokens = self.tokenize(query)
         scores = []
 
-        for idx, doc in enumerate(self.corpus):
+        for idx, term_freqs in enumerate(self.term_freqs):
             score = 0
             doc_len = self.doc_lengths[idx]
-            term_freqs = defaultdict(int)
-            for word in doc:
-                term_freqs[word] += 1
 
             for token in query_tokens:
                 if token in self.idf:
-                    tf = term_freqs[token]
+                    tf = term_freqs.get(token, 0)
                     idf = self.idf[token]
                     numerator = tf * (self.k1 + 1)
                     denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
@@ -155,34 +182,159 @@ class BM25:
         return sorted(scores, key=lambda x: x[1], reverse=True)
 
 
+# ============ PREFIX INDEX ============
+class PrefixIndex:
+    """Sorted-array prefix index for autocomplete (bisect lookup)"""
+
+    NAME, NAME_WORD, TERM = 0, 1, 2  # Rank: whole names, then names by inner word, then terms
+
+    def __init__(self):
+        self.keys = []
+        self.entries = []
+
+    def fit(self, names, term_freqs):
+        """Index name phrases (at every word start) and vocabulary terms with document frequency"""
+        entries = []
+        for name in set(names):
+            words = name.lower().split()
+            for i in range(len(words)):
+                entries.append((" ".join(words[i:]), self.NAME if i == 0 else self.NAME_WORD, 0, name))
+        for term, freq in term_freqs.items():
+            entries.append((term, self.TERM, -freq, term))
+        entries.sort()
+        self.keys = [entry[0] for entry in entries]
+        self.entries = entries
+
+    def complete(self, prefix, limit=MAX_SUGGESTIONS):
+        """Return up to limit (rank, weight, text, kind) completions for prefix, best first"""
+        prefix = " ".join(str(prefix).lower().split())
+        best = {}
+        for i in range(bisect_left(self.keys, prefix), len(self.keys)):
+            if not self.keys[i].startswith(prefix):
+                break
+            _, rank, weight, text = self.entries[i]
+            kind = "term" if rank == self.TERM else "name"
+            candidate = (rank, weight, text, kind)
+            if text.lower() not in best or candidate < best[text.lower()]:
+                best[text.lower()] = candidate
+        return sorted(best.values())[:limit]
+
+
+# ============ WCAG CONTRAST ============
+def _relative_luminance(hex_color):
+    """WCAG 2.x relative luminance of a #RRGGBB color (None if unparseable)"""
+    value = str(hex_color).strip().lstrip("#")
+    if len(value) == 3:
+        value = "".join(c * 2 for c in value)
+    try:
+        channels = [int(value[i:i + 2], 16) / 255 for i in (0, 2, 4)]
+    except ValueError:
+        return None
+    if len(value) != 6:
+        return None
+    linear = [c / 12.92 if c <= 0.03928 else ((c + 0.055) / 1.055) ** 2.4 for c in channels]
+    return 0.2126 * linear[0] + 0.7152 * linear[1] + 0.0722 * linear[2]
+
+
+def contrast_matrix(colors):
+    """
+    Pairwise WCAG contrast ratios for a {role: hex} palette.
+
+    Returns {"primary/secondary": 1.29, ..., "background/text": 17.06, "passes_aa": bool}.
+    passes_aa requires background/text >= 4.5:1 and cta/background >= 3:1.
+    """
+    luminance = {role: _relative_luminance(hex_color) for role, hex_color in colors.items()}
+    roles = [role for role in COLOR_ROLES if luminance.get(role) is not None]
+    matrix = {}
+    for i, first in enumerate(roles):
+        for second in roles[i + 1:]:
+            lighter, darker = sorted((luminance[first], luminance[second]), reverse=True)
+            matrix[f"{first}/{second}"] = round((lighter + 0.05) / (darker + 0.05), 2)
+    matrix["passes_aa"] = (matrix.get("background/text", 0) >= WCAG_AA_TEXT
+                           and matrix.get("cta/background", 0) >= WCAG_AA_UI)
+    return matrix
+
+
 # ============ SEARCH FUNCTIONS ============
+_index_cache = {}
+_contrast_cache = {}
+_prefix_cache = {}
+
+
 def _load_csv(filepath):
     """Load CSV and return list of dicts"""
     with open(filepath, 'r', encoding='utf-8') as f:
         return list(csv.DictReader(f))
 
 
-def _search_csv(filepath, search_cols, output_cols, query, max_results):
+def _get_index(filepath, search_cols):
+    """Return (rows, fitted BM25) for a CSV, reusing the index until the file changes"""
+    key = (str(filepath), tuple(search_cols))
+    mtime = filepath.stat().st_mtime_ns
+    cached = _index_cache.get(key)
+    if cached is None or cached[0] != mtime:
+        data = _load_csv(filepath)
+
+        # Build documents from search columns
+        documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
+        bm25 = BM25()
+        bm25.fit(documents)
+        cached = (mtime, data, bm25)
+        _index_cache[key] = cached
+    return cached[1], cached[2]
+
+
+def _get_prefix_index(filepath, search_cols, name_col):
+    """Prefix index over a CSV's name column and search vocabulary, rebuilt when the file changes"""
+    key = (str(filepath), tuple(search_cols), name_col)
+    mtime = filepath.stat().st_mtime_ns
+    cached = _prefix_cache.get(key)
+    if cached is None or cached[0] != mtime:
+        data, bm25 = _get_index(filepath, search_cols)
+        index = PrefixIndex()
+        index.fit([row.get(name_col, "").strip() for row in data if row.get(name_col, "").strip()],
+                  bm25.doc_freqs)
+        cached = (mtime, index)
+        _prefix_cache[key] = cached
+    return cached[1]
+
+
+def _get_contrast_table(filepath):
+    """Per-row contrast matrices for a colors CSV, computed once per file version"""
+    key = str(filepath)
+    mtime = filepath.stat().st_mtime_ns
+    cached = _contrast_cache.get(key)
+    if cached is None or cached[0] != mtime:
+        table = [
+            contrast_matrix({role: row.get(col, "") for role, col in COLOR_ROLES.items()})
+            for row in _load_csv(filepath)
+        ]
+        cached = (mtime, table)
+        _contrast_cache[key] = cached
+    return cached[1]
+
+
+def _search_csv(filepath, search_cols, output_cols, query, max_results, contrast=False, require_aa=False):
     """Core search function using BM25"""
     if not filepath.exists():
         return []
 
-    data = _load_csv(filepath)
-
-    # Build documents from search columns
-    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
-
-    # BM25 search
-    bm25 = BM25()
-    bm25.fit(documents)
+    data, bm25 = _get_index(filepath, search_cols)
     ranked = bm25.score(query)
+    contrast_table = _get_contrast_table(filepath) if contrast or require_aa else None
 
     # Get top results with score > 0
     results = []
-    for idx, score in ranked[:max_results]:
-        if score > 0:
-            row = data[idx]
-            results.append({col: row.get(col, "") for col in output_cols if col in row})
+    for idx, score in ranked:
+        if score <= 0 or len(results) >= max_results:
+            break
+        if require_aa and not contrast_table[idx]["passes_aa"]:
+            continue
+        row = data[idx]
+        result = {col: row.get(col, "") for col in output_cols if col in row}
+        if contrast_table is not None:
+            result["Contrast"] = contrast_table[idx]
+        results.append(result)
 
     return results
 
@@ -209,8 +361,13 @@ def detect_domain(query):
     return best if scores[best] > 0 else "style"
 
 
-def search(query, domain=None, max_results=MAX_RESULTS):
-    """Main search function with auto-domain detection"""
+def search(query, domain=None, max_results=MAX_RESULTS, require_aa=False):
+    """
+    Main search function with auto-domain detection.
+
+    Color results carry a precomputed "Contrast" matrix; require_aa skips
+    palettes that fail WCAG AA.
+    """
     if domain is None:
         domain = detect_domain(query)
 
@@ -220,7 +377,9 @@ def search(query, domain=None, max_results=MAX_RESULTS):
     if not filepath.exists():
         return {"error": f"File not found: {filepath}", "domain": domain}
 
-    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results)
+    is_color = config is CSV_CONFIG["color"]
+    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results,
+                          contrast=is_color, require_aa=require_aa and is_color)
 
     return {
         "domain": domain,
@@ -231,6 +390,65 @@ def search(query, domain=None, max_results=MAX_RESULTS):
     }
 
 
+def search_batch(queries, domain, max_results=MAX_RESULTS):
+    """Run several queries against one domain, sharing a single warm index"""
+    config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
+    filepath = DATA_DIR / config["file"]
+
+    if not filepath.exists():
+        return [{"error": f"File not found: {filepath}", "domain": domain} for _ in queries]
+
+    is_color = config is CSV_CONFIG["color"]
+    batch = []
+    for query in queries:
+        results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results,
+                              contrast=is_color)
+        batch.append({
+            "domain": domain,
+            "query": query,
+            "file": config["file"],
+            "count": len(results),
+            "results": results
+        })
+    return batch
+
+
+def suggest(prefix, domain=None, stack=None, limit=MAX_SUGGESTIONS):
+    """
+    Ranked autocomplete for a prefix over name columns and search vocabulary.
+
+    Searches one stack, one domain, or (by default) every CSV_CONFIG domain.
+    Whole names rank above inner-word name matches, which rank above
+    vocabulary terms (ordered by document frequency).
+    """
+    if stack is not None:
+        if stack not in STACK_CONFIG:
+            return {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}
+        sources = [(stack, DATA_DIR / STACK_CONFIG[stack]["file"], _STACK_COLS["search_cols"], SUGGEST_COLS["stack"])]
+    else:
+        domains = [domain] if domain else list(CSV_CONFIG)
+        sources = [(d, DATA_DIR / CSV_CONFIG[d]["file"], CSV_CONFIG[d]["search_cols"], SUGGEST_COLS[d])
+                   for d in domains if d in CSV_CONFIG]
+
+    best = {}
+    for source, filepath, search_cols, name_col in sources:
+        if not filepath.exists():
+            continue
+        for rank, weight, text, kind in _get_prefix_index(filepath, search_cols, name_col).complete(prefix, limit):
+            candidate = (rank, weight, text, kind, source)
+            if text.lower() not in best or candidate < best[text.lower()]:
+                best[text.lower()] = candidate
+
+    suggestions = [{"text": text, "type": kind, "source": source}
+                   for _, _, text, kind, source in sorted(best.values())[:limit]]
+    return {
+        "domain": "stack" if stack else (domain or "all"),
+        "prefix": prefix,
+        "count": len(suggestions),
+        "suggestions": suggestions
+    }
+
+
 def search_stack(query, stack, max_results=MAX_RESULTS):
     """Search stack-specific guidelines"""
     if stack not in STACK_CONFIG:
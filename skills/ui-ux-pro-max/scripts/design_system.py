@@ -11,22 +11,59 @@ Usage:
     # With persistence (Master + Overrides pattern)
     result = generate_design_system("SaaS dashboard", "My Project", persist=True)
     result = generate_design_system("SaaS dashboard", "My Project", persist=True, page="dashboard")
+    result = generate_design_system("SaaS dashboard", "My Project", persist=True,
+                                    pages=["dashboard", "checkout", "settings"])
+
+    # Rebuild the precomputed lookup table after editing the CSV data
+    precompute_design_systems()
+
+    # Regenerate only persisted projects whose source data rows changed
+    refresh_design_systems()
 """
 
+import copy
 import csv
+import hashlib
 import json
 import os
+import io
+import re
+import tempfile
 from datetime import datetime
 from pathlib import Path
 # Allow both `python design_system.py ...` and `python -m ...` execution.
 try:
-    from core import search, DATA_DIR
+    from core import search, search_batch, contrast_matrix, CSV_CONFIG, DATA_DIR
 except ImportError:  # pragma: no cover
-    from .core import search, DATA_DIR
+    from .core import search, search_batch, contrast_matrix, CSV_CONFIG, DATA_DIR
 
 
 # ============ CONFIGURATION ============
 REASONING_FILE = "ui-reasoning.csv"
+PRODUCTS_FILE = "products.csv"
+PRECOMPUTED_FILE = "design-systems.json"
+PRECOMPUTE_VERSION = 2  # Bump when generate() output changes shape
+MANIFEST_FILE = "manifest.json"
+MASTER_FILE = "MASTER.md"
+
+# Header lines that change on every render and are ignored when comparing content
+VOLATILE_LINES = re.compile(r"^(?:> )?\*\*Generated:\*\* .*$", re.MULTILINE)
+
+# Column identifying the row each design-system field was derived from
+SOURCE_KEYS = {
+    "product": "Product Type",
+    "reasoning": "UI_Category",
+    "style": "Style Category",
+    "color": "Product Type",
+    "typography": "Font Pairing Name",
+    "landing": "Pattern Name",
+    "ux": "Issue"
+}
+
+# Domains whose CSV files each output searches; any edit to them can change which rows win.
+# Page overrides only query style, ux and landing (see _generate_overrides_batch).
+MASTER_DOMAINS = ("product", "reasoning", "style", "color", "typography", "landing")
+PAGE_DOMAINS = ("style", "ux", "landing")
 
 SEARCH_CONFIG = {
     "product": {"max_results": 1},
@@ -120,7 +157,8 @@ class DesignSystemGenerator:
             "key_effects": rule.get("Key_Effects", ""),
             "anti_patterns": rule.get("Anti_Patterns", ""),
             "decision_rules": decision_rules,
-            "severity": rule.get("Severity", "MEDIUM")
+            "severity": rule.get("Severity", "MEDIUM"),
+            "rule_category": rule.get("UI_Category", "")
         }
 
     def _select_best_match(self, results: list, priority_keywords: list) -> dict:
@@ -192,6 +230,14 @@ class DesignSystemGenerator:
         best_typography = typography_results[0] if typography_results else {}
         best_landing = landing_results[0] if landing_results else {}
 
+        palette = {
+            "primary": best_color.get("Primary (Hex)", "#2563EB"),
+            "secondary": best_color.get("Secondary (Hex)", "#3B82F6"),
+            "cta": best_color.get("CTA (Hex)", "#F97316"),
+            "background": best_color.get("Background (Hex)", "#F8FAFC"),
+            "text": best_color.get("Text (Hex)", "#1E293B")
+        }
+
         # Step 5: Build final recommendation
         # Combine effects from both reasoning and style search
         style_effects = best_style.get("Effects & Animation", "")
@@ -218,12 +264,9 @@ class DesignSystemGenerator:
                 "accessibility": best_style.get("Accessibility", "")
             },
             "colors": {
-                "primary": best_color.get("Primary (Hex)", "#2563EB"),
-                "secondary": best_color.get("Secondary (Hex)", "#3B82F6"),
-                "cta": best_color.get("CTA (Hex)", "#F97316"),
-                "background": best_color.get("Background (Hex)", "#F8FAFC"),
-                "text": best_color.get("Text (Hex)", "#1E293B"),
-                "notes": best_color.get("Notes", "")
+                **palette,
+                "notes": best_color.get("Notes", ""),
+                "contrast": best_color.get("Contrast") or contrast_matrix(palette)
             },
             "typography": {
                 "heading": best_typography.get("Heading Font", "Inter"),
@@ -236,15 +279,169 @@ class DesignSystemGenerator:
             "key_effects": combined_effects,
             "anti_patterns": reasoning.get("anti_patterns", ""),
             "decision_rules": reasoning.get("decision_rules", {}),
-            "severity": reasoning.get("severity", "MEDIUM")
+            "severity": reasoning.get("severity", "MEDIUM"),
+            "sources": {
+                "product": product_results[0].get("Product Type", "") if product_results else "",
+                "reasoning": reasoning.get("rule_category", ""),
+                "style": best_style.get("Style Category", ""),
+                "color": best_color.get("Product Type", ""),
+                "typography": best_typography.get("Font Pairing Name", ""),
+                "landing": best_landing.get("Pattern Name", "")
+            }
         }
 
 
+# ============ PRECOMPUTED LOOKUP TABLE ============
+_precomputed_cache = None
+
+
+def _normalize_category(text: str) -> str:
+    """Normalize a category/query for near-exact matching (case, punctuation, spacing)."""
+    return " ".join(re.sub(r"[^\w]+", " ", str(text).lower()).split())
+
+
+def _source_digest() -> str:
+    """Hash the CSV files the generator reads, so a stale table is never served."""
+    filenames = {REASONING_FILE, PRODUCTS_FILE}
+    filenames.update(CSV_CONFIG[domain]["file"] for domain in SEARCH_CONFIG)
+    digest = hashlib.sha256(f"v{PRECOMPUTE_VERSION}".encode("utf-8"))
+    for filename in sorted(filenames):
+        filepath = DATA_DIR / filename
+        digest.update(filename.encode("utf-8"))
+        if filepath.exists():
+            digest.update(filepath.read_bytes())
+    return digest.hexdigest()
+
+
+def precompute_design_systems(output_path: str = None) -> dict:
+    """
+    Run the full generator for every product type and reasoning category and
+    store the results as a compact lookup table next to the CSV data.
+
+    Identical design systems are stored once and referenced by index.
+
+    Returns:
+        dict with the table path and entry counts
+    """
+    generator = DesignSystemGenerator()
+
+    names = [rule.get("UI_Category", "") for rule in generator.reasoning_data]
+    products_file = DATA_DIR / PRODUCTS_FILE
+    if products_file.exists():
+        with open(products_file, 'r', encoding='utf-8') as f:
+            names = [row.get("Product Type", "") for row in csv.DictReader(f)] + names
+
+    index = {}
+    systems = []
+    system_ids = {}
+    for name in names:
+        key = _normalize_category(name)
+        if not key or key in index:
+            continue
+        design_system = generator.generate(name)
+        design_system.pop("project_name", None)
+        fingerprint = json.dumps(design_system, sort_keys=True, ensure_ascii=False)
+        if fingerprint not in system_ids:
+            system_ids[fingerprint] = len(systems)
+            systems.append(design_system)
+        index[key] = system_ids[fingerprint]
+
+    table_path = Path(output_path) if output_path else DATA_DIR / PRECOMPUTED_FILE
+    table = {
+        "source_digest": _source_digest(),
+        "index": index,
+        "systems": systems
+    }
+    with open(table_path, 'w', encoding='utf-8') as f:
+        json.dump(table, f, ensure_ascii=False, separators=(",", ":"))
+        f.write("\n")
+
+    global _precomputed_cache
+    _precomputed_cache = None
+
+    return {
+        "status": "success",
+        "file": str(table_path),
+        "entries": len(index),
+        "unique_systems": len(systems)
+    }
+
+
+def _load_precomputed() -> dict:
+    """Load the lookup table once per process; empty if missing or stale."""
+    global _precomputed_cache
+    if _precomputed_cache is None:
+        _precomputed_cache = {}
+        table_path = DATA_DIR / PRECOMPUTED_FILE
+        if table_path.exists():
+            try:
+                with open(table_path, 'r', encoding='utf-8') as f:
+                    table = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                table = {}
+            if table.get("source_digest") == _source_digest():
+                _precomputed_cache = table
+    return _precomputed_cache
+
+
+def lookup_precomputed(query: str) -> dict:
+    """Return the precomputed design system for a known category, or None."""
+    table = _load_precomputed()
+    system_id = table.get("index", {}).get(_normalize_category(query))
+    if system_id is None:
+        return None
+    return copy.deepcopy(table["systems"][system_id])
+
+
 # ============ OUTPUT FORMATTERS ============
 BOX_WIDTH = 90  # Wider box for more content
+OUTPUT_FORMATS = ["ascii", "markdown", "json", "jsonl"]
+
+
+class _LineStream:
+    """List-like line sink that writes "\n"-joined lines straight to a text stream."""
+
+    def __init__(self, out):
+        self.out = out
+        self.started = False
+
+    def append(self, line: str):
+        if self.started:
+            self.out.write("\n")
+        self.out.write(line)
+        self.started = True
+
+
+def _render(write) -> str:
+    """Run a write_* formatter (given as a callable taking the stream) into a string."""
+    buffer = io.StringIO()
+    write(buffer)
+    return buffer.getvalue()
+
+
+def wrap_text(text: str, prefix: str, width: int):
+    """Wrap long text into prefixed lines no wider than width - 2 (yields lines)."""
+    if not text:
+        return
+    current_line = prefix
+    for word in text.split():
+        if len(current_line) + len(word) + 1 <= width - 2:
+            current_line += (" " if current_line != prefix else "") + word
+        else:
+            if current_line != prefix:
+                yield current_line
+            current_line = prefix + word
+    if current_line != prefix:
+        yield current_line
+
 
 def format_ascii_box(design_system: dict) -> str:
     """Format design system as ASCII box with emojis (MCP-style)."""
+    return _render(lambda out: write_ascii_box(design_system, out))
+
+
+def write_ascii_box(design_system: dict, out):
+    """Write design system as ASCII box with emojis (MCP-style) to a text stream."""
     project = design_system.get("project_name", "PROJECT")
     pattern = design_system.get("pattern", {})
     style = design_system.get("style", {})
@@ -253,30 +450,12 @@ def format_ascii_box(design_system: dict) -> str:
     effects = design_system.get("key_effects", "")
     anti_patterns = design_system.get("anti_patterns", "")
 
-    def wrap_text(text: str, prefix: str, width: int) -> list:
-        """Wrap long text into multiple lines."""
-        if not text:
-            return []
-        words = text.split()
-        lines = []
-        current_line = prefix
-        for word in words:
-            if len(current_line) + len(word) + 1 <= width - 2:
-                current_line += (" " if current_line != prefix else "") + word
-            else:
-                if current_line != prefix:
-                    lines.append(current_line)
-                current_line = prefix + word
-        if current_line != prefix:
-            lines.append(current_line)
-        return lines
-
     # Build sections from pattern
     sections = pattern.get("sections", "").split(">")
     sections = [s.strip() for s in sections if s.strip()]
 
     # Build output lines
-    lines = []
+    lines = _LineStream(out)
     w = BOX_WIDTH - 1
 
     lines.append("+" + "-" * w + "+")
@@ -365,11 +544,15 @@ def format_ascii_box(design_system: dict) -> str:
 
     lines.append("+" + "-" * w + "+")
 
-    return "\n".join(lines)
 
 
 def format_markdown(design_system: dict) -> str:
     """Format design system as markdown."""
+    return _render(lambda out: write_markdown(design_system, out))
+
+
+def write_markdown(design_system: dict, out):
+    """Write design system as markdown to a text stream."""
     project = design_system.get("project_name", "PROJECT")
     pattern = design_system.get("pattern", {})
     style = design_system.get("style", {})
@@ -378,7 +561,7 @@ def format_markdown(design_system: dict) -> str:
     effects = design_system.get("key_effects", "")
     anti_patterns = design_system.get("anti_patterns", "")
 
-    lines = []
+    lines = _LineStream(out)
     lines.append(f"## Design System: {project}")
     lines.append("")
 
@@ -459,51 +642,112 @@ def format_markdown(design_system: dict) -> str:
     lines.append("- [ ] Responsive: 375px, 768px, 1024px, 1440px")
     lines.append("")
 
-    return "\n".join(lines)
+
+
+def project_fields(design_system: dict, fields: list = None) -> dict:
+    """
+    Keep only the requested fields of a design system.
+
+    Fields are top-level keys ("colors") or dotted paths ("colors.primary");
+    unknown fields are skipped. With no fields the dict is returned unchanged.
+    """
+    if not fields:
+        return design_system
+    projected = {}
+    for field in fields:
+        parts = field.split(".")
+        value = design_system
+        for part in parts:
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            target = projected
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = value
+    return projected
+
+
+def format_json(design_system: dict, fields: list = None) -> str:
+    """Format design system as a single line of compact JSON, optionally projected to fields."""
+    return json.dumps(project_fields(design_system, fields), ensure_ascii=False, separators=(",", ":"))
+
+
+def _format_design_system(design_system: dict, output_format: str, fields: list = None) -> str:
+    """Dispatch to the formatter for output_format."""
+    if output_format in ("json", "jsonl"):
+        return format_json(design_system, fields)
+    if output_format == "markdown":
+        return format_markdown(design_system)
+    return format_ascii_box(design_system)
 
 
 # ============ MAIN ENTRY POINT ============
 def generate_design_system(query: str, project_name: str = None, output_format: str = "ascii", 
-                           persist: bool = False, page: str = None, output_dir: str = None) -> str:
+                           persist: bool = False, page: str = None, output_dir: str = None,
+                           use_precomputed: bool = True, pages: list = None, fields: list = None) -> str:
     """
     Main entry point for design system generation.
 
     Args:
         query: Search query (e.g., "SaaS dashboard", "e-commerce luxury")
         project_name: Optional project name for output header
-        output_format: "ascii" (default) or "markdown"
+        output_format: "ascii" (default), "markdown", "json" or "jsonl" (compact JSON of the generated dict)
         persist: If True, save design system to design-system/ folder
         page: Optional page name for page-specific override file
         output_dir: Optional output directory (defaults to current working directory)
+        use_precomputed: If True, answer known categories from the precomputed table
+        pages: Optional list of page names; all override files are generated in one pass
+        fields: Optional field projection for json/jsonl output (e.g. ["colors", "typography.heading"])
 
     Returns:
         Formatted design system string
     """
-    generator = DesignSystemGenerator()
-    design_system = generator.generate(query, project_name)
+    design_system = _build_design_system(query, project_name, use_precomputed)
     
     # Persist to files if requested
     if persist:
-        persist_design_system(design_system, page, output_dir, query)
+        persist_design_system(design_system, page, output_dir, query, query=query, pages=pages)
 
-    if output_format == "markdown":
-        return format_markdown(design_system)
-    return format_ascii_box(design_system)
+    return _format_design_system(design_system, output_format, fields)
+
+
+def generate_design_systems(queries: list, output_format: str = "ascii", fields: list = None,
+                            use_precomputed: bool = True) -> str:
+    """
+    Batch entry point: generate one design system per query.
+
+    "json" returns a JSON array, "jsonl" one JSON object per line, and
+    "ascii"/"markdown" the formatted outputs separated by blank lines.
+    """
+    design_systems = [_build_design_system(query, None, use_precomputed) for query in queries]
+    if output_format == "json":
+        return "[" + ",".join(format_json(ds, fields) for ds in design_systems) + "]"
+    separator = "\n" if output_format == "jsonl" else "\n\n"
+    return separator.join(_format_design_system(ds, output_format, fields) for ds in design_systems)
 
 
 # ============ PERSISTENCE FUNCTIONS ============
-def persist_design_system(design_system: dict, page: str = None, output_dir: str = None, page_query: str = None) -> dict:
+def persist_design_system(design_system: dict, page: str = None, output_dir: str = None, page_query: str = None,
+                          query: str = None, pages: list = None) -> dict:
     """
     Persist design system to design-system/<project>/ folder using Master + Overrides pattern.
+
+    Also records a manifest.json listing the data rows each file was derived from,
+    so refresh_design_systems() can regenerate only outputs whose sources changed.
+    Files whose content (ignoring the Generated timestamp) is unchanged are not rewritten.
     
     Args:
         design_system: The generated design system dictionary
         page: Optional page name for page-specific override file
         output_dir: Optional output directory (defaults to current working directory)
         page_query: Optional query string for intelligent page override generation
+        query: Original query, recorded so the project can be regenerated (defaults to page_query)
+        pages: Optional list of page names, generated together with shared searches
     
     Returns:
-        dict with created file paths and status
+        dict with created file paths, the subset left untouched, and status
     """
     base_dir = Path(output_dir) if output_dir else Path.cwd()
     
@@ -515,36 +759,302 @@ def persist_design_system(design_system: dict, page: str = None, output_dir: str
     pages_dir = design_system_dir / "pages"
     
     created_files = []
+    unchanged_files = []
     
     # Create directories
     design_system_dir.mkdir(parents=True, exist_ok=True)
     pages_dir.mkdir(parents=True, exist_ok=True)
     
-    master_file = design_system_dir / "MASTER.md"
+    manifest = _load_manifest(design_system_dir)
+    manifest["project_name"] = project_name
+    manifest["query"] = query or page_query or manifest.get("query") or project_name
+    row_index = _RowIndex()
     
     # Generate and write MASTER.md
-    master_content = format_master_md(design_system)
-    with open(master_file, 'w', encoding='utf-8') as f:
-        f.write(master_content)
-    created_files.append(str(master_file))
+    written = [_write_master(design_system, design_system_dir, manifest, row_index)]
+    
+    # If pages are specified, create page override files with intelligent content
+    page_names = list(pages or [])
+    if page and page not in page_names:
+        page_names.insert(0, page)
+    if page_names:
+        written.extend(_write_pages(design_system, design_system_dir, page_names, page_query, manifest, row_index))
+    
+    _save_manifest(design_system_dir, manifest)
     
-    # If page is specified, create page override file with intelligent content
-    if page:
-        page_file = pages_dir / f"{page.lower().replace(' ', '-')}.md"
-        page_content = format_page_override_md(design_system, page, page_query)
-        with open(page_file, 'w', encoding='utf-8') as f:
-            f.write(page_content)
-        created_files.append(str(page_file))
+    for path, changed in written:
+        created_files.append(path)
+        if not changed:
+            unchanged_files.append(path)
     
     return {
         "status": "success",
         "design_system_dir": str(design_system_dir),
-        "created_files": created_files
+        "created_files": created_files,
+        "unchanged_files": unchanged_files
+    }
+
+
+def refresh_design_systems(output_dir: str = None, use_precomputed: bool = True) -> dict:
+    """
+    Regenerate persisted design systems whose source data rows have changed.
+
+    Walks design-system/*/manifest.json under output_dir and compares each recorded
+    row hash with the current CSV data. If a searched CSV file changed in some other
+    way (new rows can shift the ranking), the project's selection is rerun and files
+    count as refreshed only if the selected rows or rendered content differ.
+    Unchanged files are never rewritten.
+
+    Returns:
+        dict with refreshed and unchanged project directories
+    """
+    base_dir = Path(output_dir) if output_dir else Path.cwd()
+    row_index = _RowIndex()
+    refreshed = []
+    unchanged = []
+
+    for manifest_path in sorted((base_dir / "design-system").glob(f"*/{MANIFEST_FILE}")):
+        design_system_dir = manifest_path.parent
+        manifest = _load_manifest(design_system_dir)
+        files = manifest.get("files", {})
+        stale = [name for name, entry in files.items()
+                 if not row_index.is_current(entry.get("sources", {}))]
+        reselect = [name for name, entry in files.items() if name not in stale and
+                    entry.get("data") != row_index.data_digest(MASTER_DOMAINS if name == MASTER_FILE else PAGE_DOMAINS)]
+        if not stale and not reselect:
+            unchanged.append(str(design_system_dir))
+            continue
+
+        design_system = _build_design_system(manifest["query"], manifest.get("project_name"), use_precomputed)
+        previous_sources = {name: files[name].get("sources") for name in reselect}
+        written = {}
+        stale_pages = {}
+        for name in stale + reselect:
+            entry = files[name]
+            if name == MASTER_FILE:
+                written[name] = _write_master(design_system, design_system_dir, manifest, row_index)[1]
+            else:
+                stale_pages.setdefault(entry.get("page_query"), []).append((name, entry["page"]))
+        for page_query, page_entries in stale_pages.items():
+            results = _write_pages(design_system, design_system_dir, [page for _, page in page_entries],
+                                   page_query, manifest, row_index)
+            for (name, _), (_, changed) in zip(page_entries, results):
+                written[name] = changed
+        _save_manifest(design_system_dir, manifest)
+
+        changed_files = stale + [name for name in reselect
+                                 if written[name] or files[name].get("sources") != previous_sources[name]]
+        if changed_files:
+            refreshed.append({"design_system_dir": str(design_system_dir), "files": changed_files})
+        else:
+            unchanged.append(str(design_system_dir))
+
+    return {
+        "status": "success",
+        "refreshed": refreshed,
+        "unchanged": unchanged
     }
 
 
+def _build_design_system(query: str, project_name: str = None, use_precomputed: bool = True) -> dict:
+    """Build a design system dict, answering known categories from the precomputed table."""
+    design_system = lookup_precomputed(query) if use_precomputed else None
+    if design_system is not None:
+        design_system["project_name"] = project_name or query.upper()
+        return design_system
+    generator = DesignSystemGenerator()
+    return generator.generate(query, project_name)
+
+
+def _write_master(design_system: dict, design_system_dir: Path, manifest: dict, row_index) -> tuple:
+    """Write MASTER.md if changed and record its source rows in the manifest."""
+    master_file = design_system_dir / MASTER_FILE
+    changed = _write_if_changed(master_file, lambda out: write_master_md(design_system, out))
+    sources = {domain: [key] for domain, key in design_system.get("sources", {}).items() if key}
+    manifest.setdefault("files", {})[MASTER_FILE] = {
+        "sources": row_index.digest(sources),
+        "data": row_index.data_digest(MASTER_DOMAINS)
+    }
+    return str(master_file), changed
+
+
+def _write_pages(design_system: dict, design_system_dir: Path, pages: list, page_query: str,
+                 manifest: dict, row_index) -> list:
+    """Write page override files if changed and record their source rows in the manifest."""
+    written = []
+    all_overrides = _generate_overrides_batch(pages, page_query, design_system)
+    for page, page_overrides in zip(pages, all_overrides):
+        page_slug = page.lower().replace(' ', '-')
+        page_file = design_system_dir / "pages" / f"{page_slug}.md"
+        changed = _write_if_changed(
+            page_file,
+            lambda out: write_page_override_md(design_system, page, out, page_query, page_overrides)
+        )
+        manifest.setdefault("files", {})[f"pages/{page_slug}.md"] = {
+            "page": page,
+            "page_query": page_query,
+            "sources": row_index.digest(page_overrides.get("sources", {})),
+            "data": row_index.data_digest(PAGE_DOMAINS)
+        }
+        written.append((str(page_file), changed))
+    return written
+
+
+def _load_manifest(design_system_dir: Path) -> dict:
+    """Load a project's manifest, or an empty one."""
+    manifest_path = design_system_dir / MANIFEST_FILE
+    if not manifest_path.exists():
+        return {}
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _save_manifest(design_system_dir: Path, manifest: dict):
+    """Write a project's manifest if changed."""
+    def write_manifest(out):
+        json.dump(manifest, out, indent=2, ensure_ascii=False, sort_keys=True)
+        out.write("\n")
+
+    _write_if_changed(design_system_dir / MANIFEST_FILE, write_manifest)
+
+
+class _ContentHasher:
+    """Write-only text stream that hashes content, blanking volatile header lines."""
+
+    def __init__(self):
+        self._digest = hashlib.sha256()
+        self._pending = ""
+
+    def _update(self, line: str):
+        if VOLATILE_LINES.fullmatch(line):
+            line = ""
+        self._digest.update(line.encode("utf-8"))
+
+    def write(self, text: str) -> int:
+        lines = (self._pending + text).split("\n")
+        self._pending = lines.pop()
+        for line in lines:
+            self._update(line)
+            self._digest.update(b"\n")
+        return len(text)
+
+    def hexdigest(self) -> str:
+        self._update(self._pending)
+        self._pending = ""
+        return self._digest.hexdigest()
+
+
+def _write_if_changed(path: Path, render) -> bool:
+    """
+    Stream content via temp file + rename unless the file on disk already matches.
+
+    Args:
+        path: Destination file
+        render: Callable writing the content to a text stream; called once to hash
+            the content and again to write it if it changed
+
+    Returns:
+        True if the file was written, False if it was left untouched
+    """
+    if path.exists():
+        try:
+            new_hash = _ContentHasher()
+            render(new_hash)
+            old_hash = _ContentHasher()
+            with open(path, 'r', encoding='utf-8') as f:
+                for chunk in iter(lambda: f.read(65536), ""):
+                    old_hash.write(chunk)
+            if old_hash.hexdigest() == new_hash.hexdigest():
+                return False
+            mode = path.stat().st_mode & 0o777
+        except (OSError, UnicodeDecodeError):
+            mode = None
+    else:
+        mode = None
+    if mode is None:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            render(f)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return True
+
+
+class _RowIndex:
+    """Lazily hashes CSV rows by their SOURCE_KEYS column, one file at a time."""
+
+    def __init__(self):
+        self._hashes = {}
+        self._file_digests = {}
+
+    @staticmethod
+    def _filename(domain: str) -> str:
+        return REASONING_FILE if domain == "reasoning" else CSV_CONFIG[domain]["file"]
+
+    def data_digest(self, domains) -> dict:
+        """Map the CSV files searched for the given domains to whole-file hashes."""
+        digests = {}
+        for domain in domains:
+            filename = self._filename(domain)
+            if filename not in self._file_digests:
+                filepath = DATA_DIR / filename
+                content = filepath.read_bytes() if filepath.exists() else b""
+                self._file_digests[filename] = hashlib.sha1(content).hexdigest()[:16]
+            digests[filename] = self._file_digests[filename]
+        return digests
+
+    def _file_hashes(self, domain: str) -> dict:
+        if domain not in self._hashes:
+            filepath = DATA_DIR / self._filename(domain)
+            grouped = {}
+            if filepath.exists():
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    for row in csv.DictReader(f):
+                        grouped.setdefault(row.get(SOURCE_KEYS[domain], ""), []).append(row)
+            self._hashes[domain] = {
+                key: hashlib.sha1(json.dumps(rows, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+                for key, rows in grouped.items()
+            }
+        return self._hashes[domain]
+
+    def digest(self, sources: dict) -> dict:
+        """Map {domain: [row keys]} to {domain: {row key: row hash}}."""
+        return {
+            domain: {key: self._file_hashes(domain).get(key, "") for key in keys}
+            for domain, keys in sources.items()
+            if domain in SOURCE_KEYS
+        }
+
+    def is_current(self, recorded: dict) -> bool:
+        """True if every recorded row still hashes to the same value."""
+        for domain, rows in recorded.items():
+            if domain not in SOURCE_KEYS:
+                return False
+            current = self._file_hashes(domain)
+            if any(current.get(key, "") != digest for key, digest in rows.items()):
+                return False
+        return True
+
+
 def format_master_md(design_system: dict) -> str:
     """Format design system as MASTER.md with hierarchical override logic."""
+    return _render(lambda out: write_master_md(design_system, out))
+
+
+def write_master_md(design_system: dict, out):
+    """Write MASTER.md content with hierarchical override logic to a text stream."""
     project = design_system.get("project_name", "PROJECT")
     pattern = design_system.get("pattern", {})
     style = design_system.get("style", {})
@@ -555,7 +1065,7 @@ def format_master_md(design_system: dict) -> str:
     
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
-    lines = []
+    lines = _LineStream(out)
     
     # Logic header
     lines.append("# Design System Master File")
@@ -803,19 +1313,26 @@ def format_master_md(design_system: dict) -> str:
     lines.append("- [ ] No horizontal scroll on mobile")
     lines.append("")
     
-    return "\n".join(lines)
 
 
-def format_page_override_md(design_system: dict, page_name: str, page_query: str = None) -> str:
+def format_page_override_md(design_system: dict, page_name: str, page_query: str = None,
+                            page_overrides: dict = None) -> str:
     """Format a page-specific override file with intelligent AI-generated content."""
+    return _render(lambda out: write_page_override_md(design_system, page_name, out, page_query, page_overrides))
+
+
+def write_page_override_md(design_system: dict, page_name: str, out, page_query: str = None,
+                           page_overrides: dict = None):
+    """Write a page-specific override file to a text stream."""
     project = design_system.get("project_name", "PROJECT")
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     page_title = page_name.replace("-", " ").replace("_", " ").title()
     
     # Detect page type and generate intelligent overrides
-    page_overrides = _generate_intelligent_overrides(page_name, page_query, design_system)
+    if page_overrides is None:
+        page_overrides = _generate_intelligent_overrides(page_name, page_query, design_system)
     
-    lines = []
+    lines = _LineStream(out)
     
     lines.append(f"# {page_title} Page Overrides")
     lines.append("")
@@ -912,7 +1429,6 @@ def format_page_override_md(design_system: dict, page_name: str, page_query: str
             lines.append(f"- {rec}")
     lines.append("")
     
-    return "\n".join(lines)
 
 
 def _generate_intelligent_overrides(page_name: str, page_query: str, design_system: dict) -> dict:
@@ -922,22 +1438,29 @@ def _generate_intelligent_overrides(page_name: str, page_query: str, design_syst
     Uses the existing search infrastructure to find relevant style, UX, and layout
     data instead of hardcoded page types.
     """
-    from .core import search
-    
-    page_lower = page_name.lower()
+    return _generate_overrides_batch([page_name], page_query, design_system)[0]
+
+
+def _generate_overrides_batch(page_names: list, page_query: str, design_system: dict) -> list:
+    """Generate overrides for several pages with one batched search per domain."""
     query_lower = (page_query or "").lower()
-    combined_context = f"{page_lower} {query_lower}"
+    contexts = [f"{page_name.lower()} {query_lower}" for page_name in page_names]
     
     # Search across multiple domains for page-specific guidance
-    style_search = search(combined_context, "style", max_results=1)
-    ux_search = search(combined_context, "ux", max_results=3)
-    landing_search = search(combined_context, "landing", max_results=1)
-    
-    # Extract results from search response
-    style_results = style_search.get("results", [])
-    ux_results = ux_search.get("results", [])
-    landing_results = landing_search.get("results", [])
+    style_searches = search_batch(contexts, "style", max_results=1)
+    ux_searches = search_batch(contexts, "ux", max_results=3)
+    landing_searches = search_batch(contexts, "landing", max_results=1)
     
+    return [
+        _build_overrides(context, style_search.get("results", []), ux_search.get("results", []),
+                         landing_search.get("results", []))
+        for context, style_search, ux_search, landing_search
+        in zip(contexts, style_searches, ux_searches, landing_searches)
+    ]
+
+
+def _build_overrides(combined_context: str, style_results: list, ux_results: list, landing_results: list) -> dict:
+    """Build one page's overrides from its style, UX and landing search results."""
     # Detect page type from search results or context
     page_type = _detect_page_type(combined_context, style_results)
     
@@ -1017,7 +1540,12 @@ def _generate_intelligent_overrides(page_name: str, page_query: str, design_syst
         "colors": colors,
         "components": components,
         "unique_components": unique_components,
-        "recommendations": recommendations
+        "recommendations": recommendations,
+        "sources": {
+            "style": [r.get("Style Category", "") for r in style_results],
+            "ux": [r.get("Issue", "") for r in ux_results],
+            "landing": [r.get("Pattern Name", "") for r in landing_results]
+        }
     }
 
 
@@ -1061,11 +1589,34 @@ if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description="Generate Design System")
-    parser.add_argument("query", help="Search query (e.g., 'SaaS dashboard')")
+    parser.add_argument("query", nargs="?", help="Search query (e.g., 'SaaS dashboard'), or '-' to read one query per line from stdin")
     parser.add_argument("--project-name", "-p", type=str, default=None, help="Project name")
-    parser.add_argument("--format", "-f", choices=["ascii", "markdown"], default="ascii", help="Output format")
+    parser.add_argument("--format", "-f", choices=OUTPUT_FORMATS, default="ascii", help="Output format")
+    parser.add_argument("--fields", type=str, default=None, help="Comma-separated fields for json/jsonl output (e.g. colors,typography.heading)")
+    parser.add_argument("--precompute", action="store_true", help=f"Rebuild data/{PRECOMPUTED_FILE} for all known categories")
+    parser.add_argument("--no-precomputed", action="store_true", help="Always run live search, ignoring the precomputed table")
+    parser.add_argument("--refresh", action="store_true", help="Regenerate persisted design systems whose source rows changed")
+    parser.add_argument("--output-dir", "-o", type=str, default=None, help="Directory containing design-system/ (default: current directory)")
 
     args = parser.parse_args()
 
-    result = generate_design_system(args.query, args.project_name, args.format)
-    print(result)
+    if args.precompute:
+        summary = precompute_design_systems()
+        print(f"Precomputed {summary['entries']} categories ({summary['unique_systems']} unique) -> {summary['file']}")
+    elif args.refresh:
+        summary = refresh_design_systems(args.output_dir, use_precomputed=not args.no_precomputed)
+        for project in summary["refreshed"]:
+            print(f"Refreshed {project['design_system_dir']}: {', '.join(project['files'])}")
+        print(f"{len(summary['refreshed'])} refreshed, {len(summary['unchanged'])} unchanged")
+    elif args.query == "-":
+        import sys
+        queries = [line.strip() for line in sys.stdin if line.strip()]
+        fields = args.fields.split(",") if args.fields else None
+        print(generate_design_systems(queries, args.format, fields, use_precomputed=not args.no_precomputed))
+    elif args.query:
+        fields = args.fields.split(",") if args.fields else None
+        result = generate_design_system(args.query, args.project_name, args.format,
+                                        use_precomputed=not args.no_precomputed, fields=fields)
+        print(result)
+    else:
+        parser.error("query is required unless --precompute is given")
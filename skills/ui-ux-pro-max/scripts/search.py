@@ -4,7 +4,12 @@
 UI/UX Pro Max Search - BM25 search engine for UI/UX style guides
 Usage: python search.py "<query>" [--domain <domain>] [--stack <stack>] [--max-results 3]
        python search.py "<query>" --design-system [-p "Project Name"]
+       python search.py "<query>" --design-system --format json [--fields colors,typography.heading]
+       python search.py - --design-system --format jsonl < queries.txt
        python search.py "<query>" --design-system --persist [-p "Project Name"] [--page "dashboard"]
+       python search.py "<query>" --design-system --persist [-p "Project Name"] [--pages "dashboard,checkout"]
+       python search.py --refresh [-o <output-dir>]
+       python search.py "<prefix>" --suggest [--domain <domain> | --stack <stack>] [-n 10]
 
 Domains: style, prompt, color, chart, landing, product, ux, typography
 Stacks: html-tailwind, react, nextjs
@@ -12,16 +17,21 @@ Stacks: html-tailwind, react, nextjs
 Persistence (Master + Overrides pattern):
   --persist    Save design system to design-system/MASTER.md
   --page       Also create a page-specific override file in design-system/pages/
+  --pages      Comma-separated pages (or --pages-file, one page per line), generated in one pass
+  --refresh    Regenerate only persisted files whose source data rows changed
 """
 
 import argparse
+from pathlib import Path
 # Allow both `python search.py ...` and `python -m ...` execution.
 try:
-    from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack
-    from design_system import generate_design_system, persist_design_system
+    from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, MAX_SUGGESTIONS, search, search_stack, suggest
+    from design_system import (OUTPUT_FORMATS, generate_design_system, generate_design_systems,
+                               persist_design_system, refresh_design_systems)
 except ImportError:  # pragma: no cover
-    from .core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack
-    from .design_system import generate_design_system, persist_design_system
+    from .core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, MAX_SUGGESTIONS, search, search_stack, suggest
+    from .design_system import (OUTPUT_FORMATS, generate_design_system, generate_design_systems,
+                                persist_design_system, refresh_design_systems)
 
 
 def format_output(result):
@@ -41,6 +51,8 @@ def format_output(result):
     for i, row in enumerate(result['results'], 1):
         output.append(f"### Result {i}")
         for key, value in row.items():
+            if isinstance(value, dict):
+                value = ", ".join(f"{k}: {v}" for k, v in value.items())
             value_str = str(value)
             if len(value_str) > 300:
                 value_str = value_str[:300] + "..."
@@ -50,33 +62,83 @@ def format_output(result):
     return "\n".join(output)
 
 
+def format_suggestions(result):
+    """Format autocomplete suggestions, one per line"""
+    if "error" in result:
+        return f"Error: {result['error']}"
+    return "\n".join(f"{s['text']}\t({s['type']}, {s['source']})" for s in result["suggestions"])
+
+
+def parse_pages(pages_arg=None, pages_file=None):
+    """Collect page names from a comma-separated list and/or a one-page-per-line file"""
+    pages = []
+    if pages_arg:
+        pages.extend(p.strip() for p in pages_arg.split(","))
+    if pages_file:
+        for line in Path(pages_file).read_text(encoding="utf-8").splitlines():
+            if not line.strip().startswith("#"):
+                pages.append(line.strip())
+    return [p for i, p in enumerate(pages) if p and p not in pages[:i]]
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="UI Pro Max Search")
-    parser.add_argument("query", help="Search query")
+    parser.add_argument("query", nargs="?", help="Search query ('-' with --design-system reads one query per line from stdin)")
     parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Search domain")
     parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help="Stack-specific search (html-tailwind, react, nextjs)")
-    parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
+    parser.add_argument("--max-results", "-n", type=int, default=None, help=f"Max results (default: {MAX_RESULTS}, or {MAX_SUGGESTIONS} with --suggest)")
+    parser.add_argument("--suggest", action="store_true", help="Autocomplete the query as a prefix (style names, product types, categories, vocabulary)")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
+    parser.add_argument("--require-aa", action="store_true", help="Color domain: skip palettes failing WCAG AA contrast")
     # Design system generation
     parser.add_argument("--design-system", "-ds", action="store_true", help="Generate complete design system recommendation")
     parser.add_argument("--project-name", "-p", type=str, default=None, help="Project name for design system output")
-    parser.add_argument("--format", "-f", choices=["ascii", "markdown"], default="ascii", help="Output format for design system")
+    parser.add_argument("--format", "-f", choices=OUTPUT_FORMATS, default=None, help="Output format for design system (default: ascii, or json with --json)")
+    parser.add_argument("--fields", type=str, default=None, help="Comma-separated design system fields for json/jsonl output (e.g. colors,typography.heading)")
     # Persistence (Master + Overrides pattern)
     parser.add_argument("--persist", action="store_true", help="Save design system to design-system/MASTER.md (creates hierarchical structure)")
     parser.add_argument("--page", type=str, default=None, help="Create page-specific override file in design-system/pages/")
+    parser.add_argument("--pages", type=str, default=None, help="Comma-separated page names for override files (e.g. dashboard,checkout,settings)")
+    parser.add_argument("--pages-file", type=str, default=None, help="File listing page names, one per line")
     parser.add_argument("--output-dir", "-o", type=str, default=None, help="Output directory for persisted files (default: current directory)")
+    parser.add_argument("--refresh", action="store_true", help="Regenerate persisted design systems whose source data rows changed")
 
     args = parser.parse_args()
 
+    if args.refresh:
+        summary = refresh_design_systems(args.output_dir)
+        for project in summary["refreshed"]:
+            print(f"Refreshed {project['design_system_dir']}: {', '.join(project['files'])}")
+        print(f"{len(summary['refreshed'])} refreshed, {len(summary['unchanged'])} unchanged")
+    elif not args.query:
+        parser.error("query is required")
+    # Prefix autocomplete
+    elif args.suggest:
+        result = suggest(args.query, args.domain, args.stack, args.max_results or MAX_SUGGESTIONS)
+        if args.json:
+            import json
+            print(json.dumps(result, ensure_ascii=False))
+        else:
+            print(format_suggestions(result))
     # Design system takes priority
-    if args.design_system:
+    # Batch design systems from stdin
+    elif args.design_system and args.query == "-":
+        import sys
+        queries = [line.strip() for line in sys.stdin if line.strip()]
+        output_format = args.format or ("json" if args.json else "ascii")
+        fields = args.fields.split(",") if args.fields else None
+        print(generate_design_systems(queries, output_format, fields))
+    elif args.design_system:
+        pages = parse_pages(args.pages, args.pages_file)
         result = generate_design_system(
             args.query, 
             args.project_name, 
-            args.format,
+            args.format or ("json" if args.json else "ascii"),
             persist=args.persist,
             page=args.page,
-            output_dir=args.output_dir
+            output_dir=args.output_dir,
+            pages=pages,
+            fields=args.fields.split(",") if args.fields else None
         )
         print(result)
         
@@ -86,8 +148,8 @@ if __name__ == "__main__":
             print("\n" + "=" * 60)
             print(f"✅ Design system persisted to design-system/{project_slug}/")
             print(f"   📄 design-system/{project_slug}/MASTER.md (Global Source of Truth)")
-            if args.page:
-                page_filename = args.page.lower().replace(' ', '-')
+            for page in ([args.page] if args.page and args.page not in pages else []) + pages:
+                page_filename = page.lower().replace(' ', '-')
                 print(f"   📄 design-system/{project_slug}/pages/{page_filename}.md (Page Overrides)")
             print("")
             print(f"📖 Usage: When building a page, check design-system/{project_slug}/pages/[page].md first.")
@@ -95,7 +157,7 @@ if __name__ == "__main__":
             print("=" * 60)
     # Stack search
     elif args.stack:
-        result = search_stack(args.query, args.stack, args.max_results)
+        result = search_stack(args.query, args.stack, args.max_results or MAX_RESULTS)
         if args.json:
             import json
             print(json.dumps(result, indent=2, ensure_ascii=False))
@@ -103,7 +165,7 @@ if __name__ == "__main__":
             print(format_output(result))
     # Domain search
     else:
-        result = search(args.query, args.domain, args.max_results)
+        result = search(args.query, args.domain, args.max_results or MAX_RESULTS, require_aa=args.require_aa)
         if args.json:
             import json
             print(json.dumps(result, indent=2, ensure_ascii=False))